@@ -1,14 +1,16 @@
 import http from "node:http";
 import { createHash } from "node:crypto";
+import { readFile } from "node:fs/promises";
 import dotenv from "dotenv";
+import { writeFileAtomic } from "../utils/atomic_write.js";
 
 dotenv.config();
 
 const PORT = 8000;
 
 function checksum(apiKey: string, requestToken: string, apiSecret: string): string {
-  const raw = `${apiKey}${requestToken}${apiSecret}`;
-  return createHash("sha256").update(raw).digest("hex");
+  // Feed the parts straight into the hash instead of building the joined string first.
+  return createHash("sha256").update(apiKey).update(requestToken).update(apiSecret).digest("hex");
 }
 
 async function exchangeToken(requestToken: string) {
@@ -31,11 +33,17 @@ async function exchangeToken(requestToken: string) {
     body: form
   });
 
-  const json = (await res.json()) as {
-    status: string;
+  const raw = await res.text();
+  let json: {
+    status?: string;
     data?: { access_token: string };
     message?: string;
   };
+  try {
+    json = JSON.parse(raw) as typeof json;
+  } catch {
+    throw new Error(`Token exchange failed: ${res.status} ${raw.slice(0, 200)}`);
+  }
 
   if (!res.ok || json.status !== "success" || !json.data?.access_token) {
     throw new Error(`Token exchange failed: ${res.status} ${json.message ?? ""}`);
@@ -82,11 +90,10 @@ server.listen(PORT, "127.0.0.1", () => {
 });
 
 async function updateEnvFile(accessToken: string) {
-  const fs = await import("node:fs/promises");
   const path = ".env";
   let content = "";
   try {
-    content = await fs.readFile(path, "utf-8");
+    content = await readFile(path, "utf-8");
   } catch {
     content = "";
   }
@@ -100,5 +107,5 @@ async function updateEnvFile(accessToken: string) {
   );
   filtered.push(`KITE_ACCESS_TOKEN=${accessToken}`);
   filtered.push(`KITE_ACCESS_TOKEN_CREATED_AT=${createdAt}`);
-  await fs.writeFile(path, filtered.join("\n") + "\n");
+  await writeFileAtomic(path, filtered.join("\n") + "\n");
 }
@@ -1,18 +1,117 @@
 import { KiteHistoricalProvider } from "../market_data/kite_historical_provider.js";
 import { SignalBuilder } from "../signal/signal_builder.js";
-import { MarketBar, ScreenerResult } from "../types.js";
-import { atr, ema, pctChange, rsi, sma } from "../utils/indicators.js";
-
-type OpenTrade = {
-  symbol: string;
-  entryTime: string;
-  entryPrice: number;
-  entryStop: number;
-  targetPrice: number;
-  qty: number;
-  daysHeld: number;
+import { BarSeries, ScreenerResult } from "../types.js";
+import { asyncPool } from "../utils/async_pool.js";
+import { bisectLeft, bisectRight } from "../utils/bisect.js";
+import { atrSeries, emaSeries, pctChange, rollingMax, rsiSeries } from "../utils/indicators.js";
+
+// Columnar view of one symbol's history, built once at load time so the
+// daily loop can index rows instead of re-materializing arrays per day.
+// Indicator columns hold the value as of each row's close.
+type SymbolSeries = {
+  time: string[];
+  day: string[];
+  high: Float64Array;
+  low: Float64Array;
+  close: Float64Array;
+  volume: Float64Array;
+  ema20: Float64Array;
+  ema50: Float64Array;
+  rsi14: Float64Array;
+  atr14: Float64Array;
+  high20: Float64Array;
+  dateIndex: Map<string, number>;
 };
 
+const EXIT_NONE = 0;
+const EXIT_STOP = 1;
+const EXIT_TARGET = 2;
+const EXIT_MAX_HOLD = 3;
+const EXIT_REASONS = ["", "stop_loss", "target_hit", "max_hold"];
+
+// Open positions as parallel arrays indexed by slot. Active slots are kept in
+// entry order so exits settle in the same order trades were opened.
+class OpenPositions {
+  readonly symbol: string[] = [];
+  readonly series: SymbolSeries[] = [];
+  readonly entryTime: string[] = [];
+  entryPrice = new Float64Array(0);
+  entryStop = new Float64Array(0);
+  targetPrice = new Float64Array(0);
+  qty = new Float64Array(0);
+  daysHeld = new Int32Array(0);
+  private readonly freeSlots: number[] = [];
+  private readonly slotBySymbol = new Map<string, number>();
+  private readonly active: number[] = [];
+
+  constructor(capacity: number) {
+    this.grow(Number.isFinite(capacity) && capacity > 0 ? Math.floor(capacity) : 8);
+  }
+
+  get size() {
+    return this.active.length;
+  }
+
+  has(symbol: string) {
+    return this.slotBySymbol.has(symbol);
+  }
+
+  activeSlots(): number[] {
+    return this.active.slice();
+  }
+
+  open(trade: {
+    symbol: string;
+    series: SymbolSeries;
+    entryTime: string;
+    entryPrice: number;
+    entryStop: number;
+    targetPrice: number;
+    qty: number;
+  }) {
+    if (this.freeSlots.length === 0) {
+      this.grow(this.entryPrice.length * 2);
+    }
+    const slot = this.freeSlots.pop()!;
+    this.symbol[slot] = trade.symbol;
+    this.series[slot] = trade.series;
+    this.entryTime[slot] = trade.entryTime;
+    this.entryPrice[slot] = trade.entryPrice;
+    this.entryStop[slot] = trade.entryStop;
+    this.targetPrice[slot] = trade.targetPrice;
+    this.qty[slot] = trade.qty;
+    this.daysHeld[slot] = 0;
+    this.slotBySymbol.set(trade.symbol, slot);
+    this.active.push(slot);
+  }
+
+  release(slot: number) {
+    this.slotBySymbol.delete(this.symbol[slot]);
+    this.active.splice(this.active.indexOf(slot), 1);
+    this.freeSlots.push(slot);
+  }
+
+  private grow(capacity: number) {
+    const previous = this.entryPrice.length;
+    this.entryPrice = resized(this.entryPrice, capacity);
+    this.entryStop = resized(this.entryStop, capacity);
+    this.targetPrice = resized(this.targetPrice, capacity);
+    this.qty = resized(this.qty, capacity);
+    const daysHeld = new Int32Array(capacity);
+    daysHeld.set(this.daysHeld);
+    this.daysHeld = daysHeld;
+    for (let slot = capacity - 1; slot >= previous; slot -= 1) {
+      this.freeSlots.push(slot);
+    }
+  }
+}
+
+function resized(values: Float64Array, capacity: number) {
+  const out = new Float64Array(capacity);
+  out.set(values);
+  return out;
+}
+
 type ClosedTrade = {
   symbol: string;
   entryTime: string;
@@ -79,6 +178,8 @@ export type BacktestRunResult = {
   notes: string[];
 };
 
+const MIN_HISTORY_BARS = 80;
+
 const DEFAULT_SYMBOLS = [
   "RELIANCE",
   "TCS",
@@ -127,111 +228,104 @@ export async function runBacktest(
     maxSignals: config.maxSignals
   });
 
+  // Per-side fill factors and the fee rate are fixed for the run.
+  const buyFillFactor = 1 + config.slippageBps / 10_000;
+  const sellFillFactor = 1 - config.slippageBps / 10_000;
+  const feeRate = config.feeBps / 10_000;
+
   let realizedPnl = 0;
-  const openTrades = new Map<string, OpenTrade>();
+  const positions = new OpenPositions(config.maxOpenPositions);
   const closedTrades: ClosedTrade[] = [];
   const equityCurve: BacktestRunResult["equityCurve"] = [];
 
   for (const day of tradingDays) {
-    const bySymbol = buildDayBarMap(barsBySymbol, day);
+    const dayRows = buildDayRowMap(barsBySymbol, day);
 
     // Exit checks run before fresh entries to avoid same-day re-entry churn.
-    for (const trade of Array.from(openTrades.values())) {
-      const bar = bySymbol.get(trade.symbol);
-      if (!bar) {
-        trade.daysHeld += 1;
+    // First pass evaluates stop > target > max-hold for every slot; second
+    // pass settles the exits.
+    const slots = positions.activeSlots();
+    const exitCode = new Uint8Array(slots.length);
+    const exitFill = new Float64Array(slots.length);
+    const exitRow = new Int32Array(slots.length);
+    for (let k = 0; k < slots.length; k += 1) {
+      const slot = slots[k];
+      positions.daysHeld[slot] += 1;
+      const row = dayRows.get(positions.symbol[slot]);
+      if (row === undefined) {
         continue;
       }
-      trade.daysHeld += 1;
-      const exit = resolveExit(bar, trade, config.maxHoldDays);
-      if (!exit) {
+      const series = positions.series[slot];
+      const stopHit = series.low[row] <= positions.entryStop[slot];
+      const targetHit = series.high[row] >= positions.targetPrice[slot];
+      const timedOut = positions.daysHeld[slot] >= config.maxHoldDays;
+      exitCode[k] = stopHit ? EXIT_STOP : targetHit ? EXIT_TARGET : timedOut ? EXIT_MAX_HOLD : EXIT_NONE;
+      const exitRaw = stopHit
+        ? positions.entryStop[slot]
+        : targetHit
+          ? positions.targetPrice[slot]
+          : series.close[row];
+      exitFill[k] = exitRaw * sellFillFactor;
+      exitRow[k] = row;
+    }
+    for (let k = 0; k < slots.length; k += 1) {
+      if (exitCode[k] === EXIT_NONE) {
         continue;
       }
-
-      const exitPrice = applySlippage(exit.price, "SELL", config.slippageBps);
-      const turnover = trade.entryPrice * trade.qty + exitPrice * trade.qty;
-      const fees = turnover * (config.feeBps / 10_000);
-      const pnl = (exitPrice - trade.entryPrice) * trade.qty - fees;
-      realizedPnl += pnl;
-      const riskPerShare = Math.max(trade.entryPrice - trade.entryStop, 0.01);
-      const rMultiple = (exitPrice - trade.entryPrice) / riskPerShare;
-
-      closedTrades.push({
-        symbol: trade.symbol,
-        entryTime: trade.entryTime,
-        exitTime: bar.time,
-        entryPrice: trade.entryPrice,
-        exitPrice,
-        qty: trade.qty,
-        pnl,
-        rMultiple,
-        reason: exit.reason
-      });
-      openTrades.delete(trade.symbol);
+      const reason = EXIT_REASONS[exitCode[k]];
+      const trade = settlePosition(positions, slots[k], exitRow[k], exitFill[k], reason, feeRate);
+      realizedPnl += trade.pnl;
+      closedTrades.push(trade);
     }
 
     const currentEquity = config.initialCapital + realizedPnl;
-    const candidates = buildCandidatesForDay(barsBySymbol, day);
+    const candidates = buildCandidatesForDay(barsBySymbol, day, config.breakoutBufferPct);
     const signals = signalBuilder.buildSignals(candidates, currentEquity);
     for (const signal of signals) {
-      if (openTrades.size >= config.maxOpenPositions) {
+      if (positions.size >= config.maxOpenPositions) {
         break;
       }
-      if (openTrades.has(signal.symbol) || signal.qty <= 0) {
+      if (positions.has(signal.symbol) || signal.qty <= 0) {
         continue;
       }
-      const bar = bySymbol.get(signal.symbol);
-      if (!bar) {
+      const row = dayRows.get(signal.symbol);
+      const series = barsBySymbol.get(signal.symbol);
+      if (row === undefined || !series) {
         continue;
       }
-      const entryPrice = applySlippage(signal.entryPrice, "BUY", config.slippageBps);
-      openTrades.set(signal.symbol, {
+      const entryPrice = signal.entryPrice * buyFillFactor;
+      positions.open({
         symbol: signal.symbol,
-        entryTime: bar.time,
+        series,
+        entryTime: series.time[row],
         entryPrice,
         entryStop: signal.stopPrice,
         targetPrice: signal.targetPrice ?? signal.entryPrice * 1.04,
-        qty: signal.qty,
-        daysHeld: 0
+        qty: signal.qty
       });
     }
 
-    const unrealizedPnl = computeUnrealizedPnl(openTrades, bySymbol);
+    const unrealizedPnl = computeUnrealizedPnl(positions, dayRows);
     const equity = config.initialCapital + realizedPnl + unrealizedPnl;
     equityCurve.push({
       date: day,
       equity,
       realizedPnl,
       unrealizedPnl,
-      openPositions: openTrades.size
+      openPositions: positions.size
     });
   }
 
-  const finalMap = buildDayBarMap(barsBySymbol, tradingDays[tradingDays.length - 1] ?? config.to);
-  for (const trade of Array.from(openTrades.values())) {
-    const bar = finalMap.get(trade.symbol);
-    if (!bar) {
+  const finalRows = buildDayRowMap(barsBySymbol, tradingDays[tradingDays.length - 1] ?? config.to);
+  for (const slot of positions.activeSlots()) {
+    const row = finalRows.get(positions.symbol[slot]);
+    if (row === undefined) {
       continue;
     }
-    const exitPrice = applySlippage(bar.close, "SELL", config.slippageBps);
-    const turnover = trade.entryPrice * trade.qty + exitPrice * trade.qty;
-    const fees = turnover * (config.feeBps / 10_000);
-    const pnl = (exitPrice - trade.entryPrice) * trade.qty - fees;
-    realizedPnl += pnl;
-    const riskPerShare = Math.max(trade.entryPrice - trade.entryStop, 0.01);
-    const rMultiple = (exitPrice - trade.entryPrice) / riskPerShare;
-    closedTrades.push({
-      symbol: trade.symbol,
-      entryTime: trade.entryTime,
-      exitTime: bar.time,
-      entryPrice: trade.entryPrice,
-      exitPrice,
-      qty: trade.qty,
-      pnl,
-      rMultiple,
-      reason: "forced_eod"
-    });
-    openTrades.delete(trade.symbol);
+    const exitPrice = positions.series[slot].close[row] * sellFillFactor;
+    const trade = settlePosition(positions, slot, row, exitPrice, "forced_eod", feeRate);
+    realizedPnl += trade.pnl;
+    closedTrades.push(trade);
   }
 
   const finalCapital = config.initialCapital + realizedPnl;
@@ -268,143 +362,206 @@ async function loadBars(
   historyFrom: string,
   rangeFrom: string,
   to: string
-): Promise<Map<string, MarketBar[]>> {
+): Promise<Map<string, SymbolSeries>> {
   const instruments = await provider.getInstruments("NSE");
-  const out = new Map<string, MarketBar[]>();
-  for (const symbol of symbols) {
+  const concurrency = Math.max(
+    1,
+    Math.floor(Number(process.env.BACKTEST_FETCH_CONCURRENCY ?? "4")) || 4
+  );
+  const loaded = await asyncPool(symbols, concurrency, async (symbol) => {
     const inst = instruments.get(symbol);
     if (!inst) {
-      continue;
+      return null;
     }
     try {
-      const bars = await provider.getHistoricalDayBars(inst.instrumentToken, historyFrom, to);
-      const normalized = bars
-        .map((b) => ({ ...b, symbol }))
-        .filter((b) => Number.isFinite(b.close) && Number.isFinite(b.volume))
-        .sort((a, b) => a.time.localeCompare(b.time));
-      const barsInRange = normalized.filter((b) => {
-        const day = b.time.slice(0, 10);
-        return day >= rangeFrom && day <= to;
-      });
-      if (barsInRange.length > 0) {
-        out.set(symbol, normalized);
-      }
+      // Provider series are already ascending with non-finite rows dropped.
+      const bars = await provider.getHistoricalDaySeries(inst.instrumentToken, historyFrom, to);
+      const series = toSymbolSeries(bars);
+      const firstInRange = bisectLeft(series.day, rangeFrom);
+      const hasBarsInRange = firstInRange < series.day.length && series.day[firstInRange] <= to;
+      return hasBarsInRange ? series : null;
     } catch {
       // Skip symbols that fail due to temporary API/instrument issues.
+      return null;
     }
-  }
+  });
+
+  // Insert in request order so downstream iteration stays deterministic.
+  const out = new Map<string, SymbolSeries>();
+  symbols.forEach((symbol, i) => {
+    const series = loaded[i];
+    if (series) {
+      out.set(symbol, series);
+    }
+  });
   return out;
 }
 
+function toSymbolSeries(bars: BarSeries): SymbolSeries {
+  const { time, high, low, close, volume } = bars;
+  const n = time.length;
+  const dayOf = new Array<string>(n);
+  const dateIndex = new Map<string, number>();
+  for (let i = 0; i < n; i += 1) {
+    const day = time[i].slice(0, 10);
+    dayOf[i] = day;
+    if (!dateIndex.has(day)) {
+      dateIndex.set(day, i);
+    }
+  }
+  return {
+    time,
+    day: dayOf,
+    high,
+    low,
+    close,
+    volume,
+    ema20: emaSeries(close, 20),
+    ema50: emaSeries(close, 50),
+    rsi14: rsiSeries(close, 14),
+    atr14: atrSeries(high, low, close, 14),
+    high20: rollingMax(high, 20),
+    dateIndex
+  };
+}
+
 function buildTradingCalendar(
-  barsBySymbol: Map<string, MarketBar[]>,
+  barsBySymbol: Map<string, SymbolSeries>,
   from: string,
   to: string
 ) {
-  const dates = new Set<string>();
-  for (const bars of barsBySymbol.values()) {
-    for (const bar of bars) {
-      const day = bar.time.slice(0, 10);
-      if (day >= from && day <= to) {
-        dates.add(day);
+  // Each series.day is already ascending, so bisect to the in-range window
+  // and merge it into the running calendar instead of hashing and sorting
+  // every bar.
+  let calendar: string[] = [];
+  for (const series of barsBySymbol.values()) {
+    const days = series.day;
+    const end = bisectRight(days, to);
+    let j = bisectLeft(days, from, 0, end);
+    if (j >= end) {
+      continue;
+    }
+    const merged: string[] = [];
+    let i = 0;
+    while (i < calendar.length || j < end) {
+      let next: string;
+      if (j >= end || (i < calendar.length && calendar[i] <= days[j])) {
+        next = calendar[i];
+        i += 1;
+      } else {
+        next = days[j];
+        j += 1;
+      }
+      if (merged.length === 0 || merged[merged.length - 1] !== next) {
+        merged.push(next);
       }
     }
+    calendar = merged;
   }
-  return Array.from(dates).sort();
+  return calendar;
 }
 
-function buildDayBarMap(barsBySymbol: Map<string, MarketBar[]>, day: string) {
-  const out = new Map<string, MarketBar>();
-  for (const [symbol, bars] of barsBySymbol.entries()) {
-    const bar = bars.find((x) => x.time.slice(0, 10) === day);
-    if (bar) {
-      out.set(symbol, bar);
+function buildDayRowMap(barsBySymbol: Map<string, SymbolSeries>, day: string) {
+  const out = new Map<string, number>();
+  for (const [symbol, series] of barsBySymbol.entries()) {
+    const idx = series.dateIndex.get(day);
+    if (idx !== undefined) {
+      out.set(symbol, idx);
     }
   }
   return out;
 }
 
 function buildCandidatesForDay(
-  barsBySymbol: Map<string, MarketBar[]>,
-  day: string
+  barsBySymbol: Map<string, SymbolSeries>,
+  day: string,
+  breakoutBufferPct: number
 ): ScreenerResult[] {
   const out: ScreenerResult[] = [];
-  for (const [symbol, bars] of barsBySymbol.entries()) {
-    const idx = bars.findIndex((b) => b.time.slice(0, 10) === day);
-    if (idx < 61) {
+  const breakoutFactor = 1 - breakoutBufferPct;
+  for (const [symbol, series] of barsBySymbol.entries()) {
+    const idx = series.dateIndex.get(day) ?? -1;
+    // Needs 80 bars of history (covers the 60-day RS lookback too).
+    if (idx < MIN_HISTORY_BARS - 1) {
       continue;
     }
-    const slice = bars.slice(0, idx + 1);
-    if (slice.length < 80) {
+    const close = series.close[idx];
+    // Same near-high test SignalBuilder applies; most symbols fail it, so
+    // reject them before the volume window sums below.
+    if (!(close >= series.high20[idx] * breakoutFactor)) {
       continue;
     }
-    const closes = slice.map((b) => b.close);
-    const volumes = slice.map((b) => b.volume);
-    const highs = slice.map((b) => b.high);
-    const lows = slice.map((b) => b.low);
-    try {
-      const close = closes[closes.length - 1];
-      const ema20 = ema(closes, 20);
-      const ema50 = ema(closes, 50);
-      const rsi14 = rsi(closes, 14);
-      const atr14 = atr(highs, lows, closes, 14);
-      const high20 = Math.max(...highs.slice(-20));
-      const adv20 = averageTradedValue(closes.slice(-20), volumes.slice(-20));
-      const volumeRatio = sma(volumes.slice(-20)) / sma(volumes.slice(-50));
-      const rsScore60d = pctChange(closes[closes.length - 61], close);
-      out.push({
-        symbol,
-        close,
-        ema20,
-        ema50,
-        rsi14,
-        atr14,
-        rsScore60d,
-        adv20,
-        volumeRatio,
-        high20
-      });
-    } catch {
-      // Ignore symbol on malformed series.
-    }
+    const length = idx + 1;
+    out.push({
+      symbol,
+      close,
+      ema20: series.ema20[idx],
+      ema50: series.ema50[idx],
+      rsi14: series.rsi14[idx],
+      atr14: series.atr14[idx],
+      rsScore60d: pctChange(series.close[idx - 60], close),
+      adv20: averageTradedValue(series.close, series.volume, length - 20, length),
+      volumeRatio:
+        windowMean(series.volume, length - 20, length) / windowMean(series.volume, length - 50, length),
+      high20: series.high20[idx]
+    });
   }
   return out.sort((a, b) => b.rsScore60d - a.rsScore60d);
 }
 
-function averageTradedValue(closes: number[], volumes: number[]) {
-  return sma(closes.map((close, i) => close * volumes[i]));
+function windowMean(values: Float64Array, start: number, end: number) {
+  let sum = 0;
+  for (let i = start; i < end; i += 1) {
+    sum += values[i];
+  }
+  return sum / (end - start);
 }
 
-function resolveExit(
-  bar: MarketBar,
-  trade: OpenTrade,
-  maxHoldDays: number
-): { price: number; reason: string } | null {
-  if (bar.low <= trade.entryStop) {
-    return { price: trade.entryStop, reason: "stop_loss" };
-  }
-  if (bar.high >= trade.targetPrice) {
-    return { price: trade.targetPrice, reason: "target_hit" };
+function averageTradedValue(closes: Float64Array, volumes: Float64Array, start: number, end: number) {
+  let sum = 0;
+  for (let i = start; i < end; i += 1) {
+    sum += closes[i] * volumes[i];
   }
-  if (trade.daysHeld >= maxHoldDays) {
-    return { price: bar.close, reason: "max_hold" };
-  }
-  return null;
+  return sum / (end - start);
 }
 
-function applySlippage(price: number, side: "BUY" | "SELL", slippageBps: number) {
-  const factor = slippageBps / 10_000;
-  return side === "BUY" ? price * (1 + factor) : price * (1 - factor);
+function settlePosition(
+  positions: OpenPositions,
+  slot: number,
+  row: number,
+  exitPrice: number,
+  reason: string,
+  feeRate: number
+): ClosedTrade {
+  const entryPrice = positions.entryPrice[slot];
+  const qty = positions.qty[slot];
+  const turnover = entryPrice * qty + exitPrice * qty;
+  const fees = turnover * feeRate;
+  const pnl = (exitPrice - entryPrice) * qty - fees;
+  const riskPerShare = Math.max(entryPrice - positions.entryStop[slot], 0.01);
+  const trade = {
+    symbol: positions.symbol[slot],
+    entryTime: positions.entryTime[slot],
+    exitTime: positions.series[slot].time[row],
+    entryPrice,
+    exitPrice,
+    qty,
+    pnl,
+    rMultiple: (exitPrice - entryPrice) / riskPerShare,
+    reason
+  };
+  positions.release(slot);
+  return trade;
 }
 
-function computeUnrealizedPnl(openTrades: Map<string, OpenTrade>, dayBars: Map<string, MarketBar>) {
+function computeUnrealizedPnl(positions: OpenPositions, dayRows: Map<string, number>) {
   let total = 0;
-  for (const trade of openTrades.values()) {
-    const bar = dayBars.get(trade.symbol);
-    if (!bar) {
+  for (const slot of positions.activeSlots()) {
+    const row = dayRows.get(positions.symbol[slot]);
+    if (row === undefined) {
       continue;
     }
-    total += (bar.close - trade.entryPrice) * trade.qty;
+    total += (positions.series[slot].close[row] - positions.entryPrice[slot]) * positions.qty[slot];
   }
   return total;
 }
@@ -419,10 +576,10 @@ function computeMetrics(
   const winRate = trades.length === 0 ? 0 : wins / trades.length;
   const avgR = avg(trades.map((t) => t.rMultiple));
   const expectancy = avg(trades.map((t) => t.pnl));
-  const maxDrawdownAbs = maxDrawdownAbsFromEquity(equityCurve.map((x) => x.equity));
-  const maxDrawdownPct = maxDrawdownPctFromEquity(equityCurve.map((x) => x.equity));
+  const equity = Float64Array.from(equityCurve, (x) => x.equity);
+  const { maxDrawdownAbs, maxDrawdownPct } = drawdownStats(equity);
   const cagrPct = calcCagr(equityCurve, initialCapital, finalCapital);
-  const sharpeProxy = calcSharpeProxy(equityCurve);
+  const sharpeProxy = calcSharpeProxy(equity);
   return { winRate, avgR, expectancy, maxDrawdownAbs, maxDrawdownPct, cagrPct, sharpeProxy };
 }
 
@@ -480,26 +637,19 @@ function parseCsv(value: string | undefined, fallback: string[]) {
     .filter((x) => x.length > 0);
 }
 
-function maxDrawdownAbsFromEquity(series: number[]) {
+function drawdownStats(equity: Float64Array) {
   let peak = Number.NEGATIVE_INFINITY;
-  let maxDd = 0;
-  for (const v of series) {
-    peak = Math.max(peak, v);
-    maxDd = Math.max(maxDd, peak - v);
-  }
-  return maxDd;
-}
-
-function maxDrawdownPctFromEquity(series: number[]) {
-  let peak = Number.NEGATIVE_INFINITY;
-  let maxDd = 0;
-  for (const v of series) {
+  let maxDrawdownAbs = 0;
+  let maxDrawdownPct = 0;
+  for (let i = 0; i < equity.length; i += 1) {
+    const v = equity[i];
     peak = Math.max(peak, v);
+    maxDrawdownAbs = Math.max(maxDrawdownAbs, peak - v);
     if (peak > 0) {
-      maxDd = Math.max(maxDd, (peak - v) / peak);
+      maxDrawdownPct = Math.max(maxDrawdownPct, (peak - v) / peak);
     }
   }
-  return maxDd;
+  return { maxDrawdownAbs, maxDrawdownPct };
 }
 
 function calcCagr(
@@ -516,20 +666,31 @@ function calcCagr(
   return (Math.pow(finalCapital / initialCapital, 1 / years) - 1) * 100;
 }
 
-function calcSharpeProxy(equityCurve: BacktestRunResult["equityCurve"]) {
-  if (equityCurve.length < 3) {
+function calcSharpeProxy(equity: Float64Array) {
+  if (equity.length < 3) {
     return 0;
   }
-  const returns: number[] = [];
-  for (let i = 1; i < equityCurve.length; i += 1) {
-    const prev = equityCurve[i - 1].equity;
-    const curr = equityCurve[i].equity;
+  const returns = new Float64Array(equity.length - 1);
+  let count = 0;
+  let sum = 0;
+  for (let i = 1; i < equity.length; i += 1) {
+    const prev = equity[i - 1];
     if (prev > 0) {
-      returns.push((curr - prev) / prev);
+      const r = (equity[i] - prev) / prev;
+      returns[count] = r;
+      count += 1;
+      sum += r;
     }
   }
-  const mu = avg(returns);
-  const sigma = std(returns);
+  if (count < 2) {
+    return 0;
+  }
+  const mu = sum / count;
+  let squares = 0;
+  for (let i = 0; i < count; i += 1) {
+    squares += (returns[i] - mu) ** 2;
+  }
+  const sigma = Math.sqrt(squares / count);
   if (sigma === 0) {
     return 0;
   }
@@ -543,15 +704,6 @@ function avg(values: number[]) {
   return values.reduce((acc, v) => acc + v, 0) / values.length;
 }
 
-function std(values: number[]) {
-  if (values.length < 2) {
-    return 0;
-  }
-  const mu = avg(values);
-  const variance = avg(values.map((v) => (v - mu) ** 2));
-  return Math.sqrt(variance);
-}
-
 function todayDate() {
   const d = new Date();
   return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(
@@ -1,5 +1,5 @@
 import fs from "node:fs/promises";
-import { KiteHistoricalProvider } from "../market_data/kite_historical_provider.js";
+import { getSharedHistoricalProvider } from "../market_data/kite_historical_provider.js";
 import { PostgresPersistence } from "../persistence/postgres_persistence.js";
 import { runBacktest } from "./engine.js";
 
@@ -12,7 +12,7 @@ export async function runConfiguredBacktest() {
 
   const symbols = parseCsv(process.env.BACKTEST_SYMBOLS);
   const result = await runBacktest(
-    new KiteHistoricalProvider({ apiKey, accessToken }),
+    getSharedHistoricalProvider(apiKey, accessToken),
     {
       from: process.env.BACKTEST_FROM,
       to: process.env.BACKTEST_TO,
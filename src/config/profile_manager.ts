@@ -1,6 +1,8 @@
 import path from "node:path";
-import { readFile, writeFile } from "node:fs/promises";
+import { readFile } from "node:fs/promises";
 import { existsSync } from "node:fs";
+import { writeFileAtomic } from "../utils/atomic_write.js";
+import { invalidateRuntimeConfig } from "./runtime_config.js";
 
 export type ProfileName = "phase1" | "phase2" | "phase3";
 
@@ -57,11 +59,12 @@ export async function applyProfile(name: ProfileName) {
   const current = await loadCurrentEnvMap();
   const profile = await loadProfileMap(name);
   const next = { ...current, ...profile };
-  await writeFile(envPath(), dumpEnv(next), "utf-8");
+  await writeFileAtomic(envPath(), dumpEnv(next));
 
   for (const [k, v] of Object.entries(profile)) {
     process.env[k] = v;
   }
+  invalidateRuntimeConfig();
 
   return {
     profile: name,
@@ -74,10 +77,11 @@ export async function applyProfile(name: ProfileName) {
 export async function applyEnvOverrides(values: Record<string, string>) {
   const current = await loadCurrentEnvMap();
   const next = { ...current, ...values };
-  await writeFile(envPath(), dumpEnv(next), "utf-8");
+  await writeFileAtomic(envPath(), dumpEnv(next));
   for (const [k, v] of Object.entries(values)) {
     process.env[k] = v;
   }
+  invalidateRuntimeConfig();
   return {
     appliedKeys: Object.keys(values).length,
     updatedAt: new Date().toISOString(),
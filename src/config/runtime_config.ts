@@ -0,0 +1,50 @@
+import { SignalBuilderConfig } from "../signal/signal_builder.js";
+import { RiskLimits } from "../types.js";
+
+export interface RuntimeConfig {
+  startingEquity: number;
+  riskLimits: RiskLimits;
+  signal: SignalBuilderConfig;
+  trailingAtrMultiple: number;
+}
+
+let cached: RuntimeConfig | null = null;
+
+// Env-driven strategy and risk settings, parsed once and shared by every
+// runtime in the process. Only the profile manager changes these keys at
+// runtime, and it calls invalidateRuntimeConfig after writing process.env.
+export function getRuntimeConfig(): RuntimeConfig {
+  if (!cached) {
+    cached = loadRuntimeConfig();
+  }
+  return cached;
+}
+
+export function invalidateRuntimeConfig() {
+  cached = null;
+}
+
+function loadRuntimeConfig(): RuntimeConfig {
+  const riskLimits: RiskLimits = {
+    maxDailyLoss: Number(process.env.MAX_DAILY_LOSS ?? "50000"),
+    maxOpenPositions: Number(process.env.MAX_OPEN_POSITIONS ?? "5"),
+    maxOrdersPerDay: Number(process.env.MAX_ORDERS_PER_DAY ?? "10"),
+    maxExposurePerSymbol: Number(process.env.MAX_EXPOSURE_PER_SYMBOL ?? "300000"),
+    riskPerTrade: Number(process.env.RISK_PER_TRADE ?? "0.015")
+  };
+  return {
+    startingEquity: Number(process.env.STARTING_EQUITY ?? "1000000"),
+    riskLimits,
+    signal: {
+      minRsi: Number(process.env.STRATEGY_MIN_RSI ?? "55"),
+      breakoutBufferPct: Number(process.env.STRATEGY_BREAKOUT_BUFFER_PCT ?? "0.02"),
+      atrStopMultiple: Number(process.env.ATR_STOP_MULTIPLE ?? "2"),
+      riskPerTrade: riskLimits.riskPerTrade,
+      minCapitalDeployPct: Number(process.env.MIN_CAPITAL_DEPLOY_PCT ?? "0"),
+      minAdv20: Number(process.env.STRATEGY_MIN_ADV20 ?? "100000000"),
+      minVolumeRatio: Number(process.env.STRATEGY_MIN_VOLUME_RATIO ?? "1.2"),
+      maxSignals: Number(process.env.STRATEGY_MAX_SIGNALS ?? "5")
+    },
+    trailingAtrMultiple: Number(process.env.ATR_TRAILING_MULTIPLE ?? "2")
+  };
+}
@@ -2,8 +2,12 @@ import { Order, Fill } from "../types.js";
 import { LtpProvider } from "../market_data/ltp_provider.js";
 import { InMemoryStore } from "../storage/store.js";
 import { Persistence } from "../persistence/persistence.js";
+import { kiteApiBucket, kiteOrderBucket } from "../utils/rate_limiter.js";
 
 export class ZerodhaAdapter {
+  private readonly baseUrl: string;
+  private authHeaders: Record<string, string> | null = null;
+
   constructor(
     private ltpProvider: LtpProvider,
     private cfg: {
@@ -15,12 +19,18 @@ export class ZerodhaAdapter {
       exchange?: string;
       orderVariety?: "regular" | "amo";
     } = { mode: "paper" }
-  ) {}
+  ) {
+    this.baseUrl = cfg.baseUrl ?? "https://api.kite.trade";
+  }
 
   async getLtp(symbol: string): Promise<number> {
     return this.ltpProvider.getLtp(symbol);
   }
 
+  async getLtps(symbols: string[]): Promise<Map<string, number>> {
+    return this.ltpProvider.getLtps(symbols);
+  }
+
   isLiveMode(): boolean {
     return this.cfg.mode === "live";
   }
@@ -52,14 +62,7 @@ export class ZerodhaAdapter {
     if (!this.isLiveMode()) {
       return { ok: true, mode: "paper", message: "Paper mode preflight passed" };
     }
-    const { apiKey, accessToken } = this.credentials();
-    const baseUrl = this.cfg.baseUrl ?? "https://api.kite.trade";
-    const res = await fetch(`${baseUrl}/user/profile`, {
-      headers: {
-        "X-Kite-Version": "3",
-        Authorization: `token ${apiKey}:${accessToken}`
-      }
-    });
+    const res = await this.kiteFetch(`/user/profile`);
     if (!res.ok) {
       const body = await res.text();
       return {
@@ -91,14 +94,7 @@ export class ZerodhaAdapter {
         source: "paper"
       };
     }
-    const { apiKey, accessToken } = this.credentials();
-    const baseUrl = this.cfg.baseUrl ?? "https://api.kite.trade";
-    const res = await fetch(`${baseUrl}/user/margins/equity`, {
-      headers: {
-        "X-Kite-Version": "3",
-        Authorization: `token ${apiKey}:${accessToken}`
-      }
-    });
+    const res = await this.kiteFetch(`/user/margins/equity`);
     if (!res.ok) {
       const body = await res.text();
       throw new Error(`fetchAvailableFunds failed ${res.status}: ${body}`);
@@ -150,14 +146,7 @@ export class ZerodhaAdapter {
     if (!this.isLiveMode()) {
       return [];
     }
-    const { apiKey, accessToken } = this.credentials();
-    const baseUrl = this.cfg.baseUrl ?? "https://api.kite.trade";
-    const res = await fetch(`${baseUrl}/orders`, {
-      headers: {
-        "X-Kite-Version": "3",
-        Authorization: `token ${apiKey}:${accessToken}`
-      }
-    });
+    const res = await this.kiteFetch(`/orders`);
     if (!res.ok) {
       const body = await res.text();
       throw new Error(`fetchBrokerOrders failed ${res.status}: ${body}`);
@@ -212,10 +201,8 @@ export class ZerodhaAdapter {
     if (!this.isLiveMode()) {
       throw new Error("GTT create requires live mode");
     }
-    const { apiKey, accessToken } = this.credentials();
     const exchange = this.cfg.exchange ?? "NSE";
     const product = this.cfg.product ?? "CNC";
-    const baseUrl = this.cfg.baseUrl ?? "https://api.kite.trade";
     const condition = {
       exchange,
       tradingsymbol: params.symbol,
@@ -247,12 +234,8 @@ export class ZerodhaAdapter {
       condition: JSON.stringify(condition),
       orders: JSON.stringify(orders)
     });
-    const res = await fetch(`${baseUrl}/gtt/triggers`, {
+    const res = await this.kiteFetch("/gtt/triggers", {
       method: "POST",
-      headers: {
-        "X-Kite-Version": "3",
-        Authorization: `token ${apiKey}:${accessToken}`
-      },
       body
     });
     const raw = await res.text();
@@ -283,14 +266,7 @@ export class ZerodhaAdapter {
     if (!this.isLiveMode()) {
       return [];
     }
-    const { apiKey, accessToken } = this.credentials();
-    const baseUrl = this.cfg.baseUrl ?? "https://api.kite.trade";
-    const res = await fetch(`${baseUrl}/gtt/triggers`, {
-      headers: {
-        "X-Kite-Version": "3",
-        Authorization: `token ${apiKey}:${accessToken}`
-      }
-    });
+    const res = await this.kiteFetch(`/gtt/triggers`);
     const raw = await res.text();
     if (!res.ok) {
       throw new Error(`GTT list failed ${res.status}: ${raw}`);
@@ -324,14 +300,8 @@ export class ZerodhaAdapter {
     if (!this.isLiveMode()) {
       return;
     }
-    const { apiKey, accessToken } = this.credentials();
-    const baseUrl = this.cfg.baseUrl ?? "https://api.kite.trade";
-    const res = await fetch(`${baseUrl}/gtt/triggers/${encodeURIComponent(gttId)}`, {
-      method: "DELETE",
-      headers: {
-        "X-Kite-Version": "3",
-        Authorization: `token ${apiKey}:${accessToken}`
-      }
+    const res = await this.kiteFetch(`/gtt/triggers/${encodeURIComponent(gttId)}`, {
+      method: "DELETE"
     });
     const raw = await res.text();
     if (!res.ok) {
@@ -346,14 +316,7 @@ export class ZerodhaAdapter {
     if (!this.isLiveMode()) {
       return;
     }
-    const { apiKey, accessToken } = this.credentials();
-    const baseUrl = this.cfg.baseUrl ?? "https://api.kite.trade";
-    const res = await fetch(`${baseUrl}/portfolio/positions`, {
-      headers: {
-        "X-Kite-Version": "3",
-        Authorization: `token ${apiKey}:${accessToken}`
-      }
-    });
+    const res = await this.kiteFetch(`/portfolio/positions`);
     if (!res.ok) {
       const body = await res.text();
       throw new Error(`Broker position reconcile failed ${res.status}: ${body}`);
@@ -367,30 +330,32 @@ export class ZerodhaAdapter {
     const liveLongs = net.filter((p) => p.quantity > 0);
     const liveMap = new Map(liveLongs.map((p) => [p.tradingsymbol, p]));
 
+    const stale: string[] = [];
     for (const symbol of Array.from(store.positions.keys())) {
       if (!liveMap.has(symbol)) {
         store.positions.delete(symbol);
-        await persistence.deletePosition(symbol);
+        stale.push(symbol);
       }
     }
 
-    for (const p of liveLongs) {
-      store.positions.set(p.tradingsymbol, {
-        symbol: p.tradingsymbol,
-        qty: p.quantity,
-        avgPrice: p.average_price
-      });
-      await persistence.upsertPosition({
-        symbol: p.tradingsymbol,
-        qty: p.quantity,
-        avgPrice: p.average_price
-      });
+    // Kite can list one symbol on several rows (CNC/MIS, NSE/BSE). liveMap
+    // keeps the last, as the old per-row upserts did, and a single
+    // ON CONFLICT upsert must not see a symbol twice.
+    const synced = Array.from(liveMap.values(), (p) => ({
+      symbol: p.tradingsymbol,
+      qty: p.quantity,
+      avgPrice: p.average_price
+    }));
+    for (const position of synced) {
+      store.positions.set(position.symbol, position);
     }
+    // The broker snapshot is written as one delete and one upsert rather
+    // than a round-trip per symbol.
+    await persistence.deletePositions(stale);
+    await persistence.upsertPositions(synced);
   }
 
   private async placeLiveOrder(order: Order): Promise<Fill> {
-    const { apiKey, accessToken } = this.credentials();
-    const baseUrl = this.cfg.baseUrl ?? "https://api.kite.trade";
     const configuredVariety = this.cfg.orderVariety ?? "regular";
     const allowAmoFallback = process.env.KITE_ENABLE_AMO_FALLBACK === "1";
     const exchange = this.cfg.exchange ?? "NSE";
@@ -409,24 +374,12 @@ export class ZerodhaAdapter {
       form.set("price", String(order.intent.price));
     }
 
-    const initialAttempt = await placeOrderWithVariety(
-      baseUrl,
-      configuredVariety,
-      apiKey,
-      accessToken,
-      form
-    );
+    const initialAttempt = await this.placeOrderWithVariety(configuredVariety, form);
     let placed = initialAttempt.placed;
     if (!initialAttempt.ok) {
       const amoHint = extractAmoHint(initialAttempt.body);
       if (amoHint && configuredVariety !== "amo" && allowAmoFallback) {
-        const amoAttempt = await placeOrderWithVariety(
-          baseUrl,
-          "amo",
-          apiKey,
-          accessToken,
-          form
-        );
+        const amoAttempt = await this.placeOrderWithVariety("amo", form);
         if (!amoAttempt.ok) {
           throw new Error(
             `Live place order failed ${amoAttempt.status}: ${amoAttempt.body} (AMO retry attempted)`
@@ -448,7 +401,7 @@ export class ZerodhaAdapter {
       throw new Error(`Live place order missing order_id: ${placed.message ?? "unknown"}`);
     }
 
-    const averagePrice = await this.pollAveragePrice(baseUrl, apiKey, accessToken, brokerOrderId);
+    const averagePrice = await this.pollAveragePrice(brokerOrderId);
     const fallbackPrice = order.intent.price ?? (await this.ltpProvider.getLtp(order.intent.symbol));
     return {
       orderId: order.orderId,
@@ -460,21 +413,11 @@ export class ZerodhaAdapter {
     };
   }
 
-  private async pollAveragePrice(
-    baseUrl: string,
-    apiKey: string,
-    accessToken: string,
-    brokerOrderId: string
-  ): Promise<number | null> {
+  private async pollAveragePrice(brokerOrderId: string): Promise<number | null> {
     const maxPolls = Number(process.env.BROKER_STATUS_POLL_COUNT ?? "5");
     const pollMs = Number(process.env.BROKER_STATUS_POLL_MS ?? "1500");
     for (let i = 0; i < maxPolls; i += 1) {
-      const res = await fetch(`${baseUrl}/orders`, {
-        headers: {
-          "X-Kite-Version": "3",
-          Authorization: `token ${apiKey}:${accessToken}`
-        }
-      });
+      const res = await this.kiteFetch("/orders");
       if (res.ok) {
         const json = (await res.json()) as {
           data?: Array<{
@@ -506,6 +449,68 @@ export class ZerodhaAdapter {
     return null;
   }
 
+  private async placeOrderWithVariety(
+    variety: "regular" | "amo",
+    form: URLSearchParams
+  ): Promise<{
+    ok: boolean;
+    status: number;
+    body: string;
+    placed: {
+      status: string;
+      data?: { order_id: string };
+      message?: string;
+    };
+  }> {
+    const res = await this.kiteFetch(`/orders/${variety}`, {
+      method: "POST",
+      body: form
+    });
+    const body = await res.text();
+    if (!res.ok) {
+      return {
+        ok: false,
+        status: res.status,
+        body,
+        placed: { status: "error", message: body }
+      };
+    }
+    let placed: {
+      status: string;
+      data?: { order_id: string };
+      message?: string;
+    } = { status: "error", message: "empty response" };
+    try {
+      placed = JSON.parse(body) as {
+        status: string;
+        data?: { order_id: string };
+        message?: string;
+      };
+    } catch {
+      placed = { status: "error", message: body };
+    }
+    return { ok: true, status: res.status, body, placed };
+  }
+
+  // Every broker call goes through here so base URL and auth headers are
+  // built once and requests share the process-wide Kite rate limits; fetch
+  // itself reuses keep-alive sockets process-wide.
+  private async kiteFetch(
+    path: string,
+    init: { method?: string; body?: URLSearchParams } = {}
+  ) {
+    if (!this.authHeaders) {
+      const { apiKey, accessToken } = this.credentials();
+      this.authHeaders = {
+        "X-Kite-Version": "3",
+        Authorization: `token ${apiKey}:${accessToken}`
+      };
+    }
+    const isOrderWrite = (init.method ?? "GET") !== "GET" && path.startsWith("/orders");
+    await (isOrderWrite ? kiteOrderBucket() : kiteApiBucket()).acquire();
+    return fetch(`${this.baseUrl}${path}`, { ...init, headers: this.authHeaders });
+  }
+
   private credentials() {
     const apiKey = this.cfg.apiKey;
     const accessToken = this.cfg.accessToken;
@@ -525,56 +530,6 @@ function extractAmoHint(body: string): boolean {
   }
 }
 
-async function placeOrderWithVariety(
-  baseUrl: string,
-  variety: "regular" | "amo",
-  apiKey: string,
-  accessToken: string,
-  form: URLSearchParams
-): Promise<{
-  ok: boolean;
-  status: number;
-  body: string;
-  placed: {
-    status: string;
-    data?: { order_id: string };
-    message?: string;
-  };
-}> {
-  const res = await fetch(`${baseUrl}/orders/${variety}`, {
-    method: "POST",
-    headers: {
-      "X-Kite-Version": "3",
-      Authorization: `token ${apiKey}:${accessToken}`
-    },
-    body: form
-  });
-  const body = await res.text();
-  if (!res.ok) {
-    return {
-      ok: false,
-      status: res.status,
-      body,
-      placed: { status: "error", message: body }
-    };
-  }
-  let placed: {
-    status: string;
-    data?: { order_id: string };
-    message?: string;
-  } = { status: "error", message: "empty response" };
-  try {
-    placed = JSON.parse(body) as {
-      status: string;
-      data?: { order_id: string };
-      message?: string;
-    };
-  } catch {
-    placed = { status: "error", message: body };
-  }
-  return { ok: true, status: res.status, body, placed };
-}
-
 function sleep(ms: number): Promise<void> {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
@@ -1,12 +1,29 @@
 import dotenv from "dotenv";
+import { closeSharedKiteTicker } from "../market_data/kite_ticker_ltp_provider.js";
+import { closePostgresPools } from "../persistence/postgres_persistence.js";
 import { runEntryPass, runMonitorPass } from "../pipeline.js";
 
 dotenv.config();
 
 const INTERVAL_SECONDS = Number(process.env.LIVE_LOOP_INTERVAL_SECONDS ?? "120");
 const RUN_ENTRY_ON_START = (process.env.LIVE_ENTRY_ON_START ?? "1") === "1";
+const IST_OFFSET_MS = 330 * 60 * 1000;
+const MINUTE_MS = 60 * 1000;
+const DAY_MS = 24 * 60 * MINUTE_MS;
+const MARKET_START_MINUTE = 9 * 60 + 15;
+const MARKET_END_MINUTE = 15 * 60 + 30;
 
 async function main() {
+  // First SIGINT/SIGTERM stops the loop after the current pass; a second one
+  // falls through to Node's default handler and kills the process.
+  const stop = new AbortController();
+  for (const signal of ["SIGINT", "SIGTERM"] as const) {
+    process.once(signal, () => {
+      console.log("LIVE_LOOP_STOP_REQUESTED", signal);
+      stop.abort();
+    });
+  }
+
   console.log("LIVE_LOOP_START");
   console.log(`interval_seconds=${INTERVAL_SECONDS}`);
 
@@ -15,38 +32,49 @@ async function main() {
     await runEntryPass();
   }
 
-  while (isWithinTradingWindowIST()) {
+  while (!stop.signal.aborted && isWithinTradingWindowIST()) {
     console.log("LIVE_LOOP_MONITOR_PASS", new Date().toISOString());
     await runMonitorPass();
-    await sleep(INTERVAL_SECONDS * 1000);
+    await sleep(INTERVAL_SECONDS * 1000, stop.signal);
   }
 
   console.log("LIVE_LOOP_END", new Date().toISOString());
+  // Release the ticker socket and idle pg connections so the process exits
+  // without waiting on them.
+  closeSharedKiteTicker();
+  await closePostgresPools();
 }
 
+// IST is a fixed UTC+05:30 with no DST, so the window check is integer
+// arithmetic on the epoch rather than an Intl formatter per pass.
 function isWithinTradingWindowIST(): boolean {
-  const now = new Date();
-  const parts = new Intl.DateTimeFormat("en-GB", {
-    timeZone: "Asia/Kolkata",
-    hour12: false,
-    weekday: "short",
-    hour: "2-digit",
-    minute: "2-digit"
-  }).formatToParts(now);
-
-  const weekday = parts.find((p) => p.type === "weekday")?.value ?? "";
-  const hour = Number(parts.find((p) => p.type === "hour")?.value ?? "0");
-  const minute = Number(parts.find((p) => p.type === "minute")?.value ?? "0");
-  const totalMinutes = hour * 60 + minute;
-
-  const isWeekday = ["Mon", "Tue", "Wed", "Thu", "Fri"].includes(weekday);
-  const marketStart = 9 * 60 + 15;
-  const marketEnd = 15 * 60 + 30;
-  return isWeekday && totalMinutes >= marketStart && totalMinutes <= marketEnd;
+  const istMs = Date.now() + IST_OFFSET_MS;
+  const weekday = (Math.floor(istMs / DAY_MS) + 4) % 7; // 0 = Sunday
+  const totalMinutes = Math.floor(istMs / MINUTE_MS) % (24 * 60);
+  return (
+    weekday >= 1 &&
+    weekday <= 5 &&
+    totalMinutes >= MARKET_START_MINUTE &&
+    totalMinutes <= MARKET_END_MINUTE
+  );
 }
 
-function sleep(ms: number): Promise<void> {
-  return new Promise((resolve) => setTimeout(resolve, ms));
+function sleep(ms: number, signal: AbortSignal): Promise<void> {
+  return new Promise((resolve) => {
+    if (signal.aborted) {
+      resolve();
+      return;
+    }
+    const onAbort = () => {
+      clearTimeout(timer);
+      resolve();
+    };
+    const timer = setTimeout(() => {
+      signal.removeEventListener("abort", onAbort);
+      resolve();
+    }, ms);
+    signal.addEventListener("abort", onAbort, { once: true });
+  });
 }
 
 await main();
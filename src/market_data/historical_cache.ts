@@ -0,0 +1,188 @@
+import { mkdir, readFile } from "node:fs/promises";
+import { join } from "node:path";
+import { writeFileAtomic } from "../utils/atomic_write.js";
+import { bisectLeft, bisectRight } from "../utils/bisect.js";
+
+export type DayCandle = [string, number, number, number, number, number];
+
+interface CacheFile {
+  version: 1;
+  writtenAt: string;
+  coveredFrom: string;
+  coveredTo: string;
+  candles: DayCandle[];
+}
+
+interface DailyFile<T> {
+  version: 1;
+  day: string;
+  value: T;
+}
+
+const CACHE_VERSION = 1;
+const DAY_MS = 24 * 60 * 60 * 1000;
+const IST_OFFSET_MS = 330 * 60 * 1000;
+const DAY_RE = /^\d{4}-\d{2}-\d{2}$/;
+
+// Disk cache of daily candles, one file per instrument token. Each file
+// covers one contiguous date range of completed sessions, so a request only
+// fetches the days outside that range and the two are merged. Today's
+// candle is never stored because it is still forming until the close.
+// Bar files are named by numeric token, so named daily files cannot clash.
+export class HistoricalBarCache {
+  private readonly locks = new Map<string, Promise<unknown>>();
+
+  constructor(
+    private readonly dir: string,
+    private readonly maxAgeDays = Number(process.env.HISTORICAL_CACHE_MAX_AGE_DAYS ?? "7")
+  ) {}
+
+  async getCandles(
+    instrumentToken: string,
+    from: string,
+    to: string,
+    fetchRange: (from: string, to: string) => Promise<DayCandle[]>
+  ): Promise<DayCandle[]> {
+    const lastFinalDay = addDays(todayIST(), -1);
+    if (!DAY_RE.test(from) || !DAY_RE.test(to) || from > lastFinalDay || from > to) {
+      return fetchRange(from, to);
+    }
+
+    // Serialize per token so concurrent callers extend the same file in turn
+    // instead of racing each other's fetches.
+    return this.withLock(instrumentToken, async () => {
+      const cached = await this.read(instrumentToken);
+      const byDay = new Map<string, DayCandle>();
+      let fetched = !cached;
+      let coveredFrom = from;
+      let coveredTo = to < lastFinalDay ? to : lastFinalDay;
+
+      if (!cached) {
+        for (const candle of await fetchRange(from, to)) {
+          byDay.set(candleDay(candle), candle);
+        }
+      } else {
+        for (const candle of cached.candles) {
+          byDay.set(candleDay(candle), candle);
+        }
+        // Extend the covered range so it stays contiguous, even when that
+        // means fetching a few days beyond the requested window.
+        if (from < cached.coveredFrom) {
+          fetched = true;
+          for (const candle of await fetchRange(from, addDays(cached.coveredFrom, -1))) {
+            byDay.set(candleDay(candle), candle);
+          }
+        } else {
+          coveredFrom = cached.coveredFrom;
+        }
+        if (to > cached.coveredTo) {
+          fetched = true;
+          for (const candle of await fetchRange(addDays(cached.coveredTo, 1), to)) {
+            byDay.set(candleDay(candle), candle);
+          }
+        }
+        if (cached.coveredTo > coveredTo) {
+          coveredTo = cached.coveredTo;
+        }
+      }
+
+      // Both ranges are contiguous runs of the sorted days, so each is one
+      // slice between bisected bounds rather than a per-candle test.
+      const days = [...byDay.keys()].sort();
+      const candles = days.map((day) => byDay.get(day) as DayCandle);
+      const stored = candles.slice(bisectLeft(days, coveredFrom), bisectRight(days, coveredTo));
+      const out = candles.slice(bisectLeft(days, from), bisectRight(days, to));
+
+      if (fetched) {
+        await this.write(instrumentToken, {
+          version: CACHE_VERSION,
+          writtenAt: cached?.writtenAt ?? new Date().toISOString(),
+          coveredFrom,
+          coveredTo,
+          candles: stored
+        });
+      }
+      return out;
+    });
+  }
+
+  // Whole-value cache for data that is refreshed once per IST day (the
+  // instrument dump): reused when it was written today, refetched otherwise.
+  async getDaily<T>(name: string, fetchValue: () => Promise<T>): Promise<T> {
+    const path = join(this.dir, `${name}.json`);
+    const today = todayIST();
+    try {
+      const parsed = JSON.parse(await readFile(path, "utf-8")) as DailyFile<T>;
+      if (parsed.version === CACHE_VERSION && parsed.day === today) {
+        return parsed.value;
+      }
+    } catch {
+      // Missing or unreadable; fall through to a fresh fetch.
+    }
+    const value = await fetchValue();
+    const file: DailyFile<T> = { version: CACHE_VERSION, day: today, value };
+    await mkdir(this.dir, { recursive: true });
+    await writeFileAtomic(path, JSON.stringify(file));
+    return value;
+  }
+
+  private async read(instrumentToken: string): Promise<CacheFile | null> {
+    let raw: string;
+    try {
+      raw = await readFile(this.filePath(instrumentToken), "utf-8");
+    } catch {
+      return null;
+    }
+    try {
+      const parsed = JSON.parse(raw) as CacheFile;
+      if (parsed.version !== CACHE_VERSION || !Array.isArray(parsed.candles)) {
+        return null;
+      }
+      // Kite back-adjusts history for splits and bonuses, so drop files that
+      // have not been rebuilt from a fresh fetch in a while.
+      const ageMs = Date.now() - Date.parse(parsed.writtenAt);
+      if (!Number.isFinite(ageMs) || ageMs > this.maxAgeDays * DAY_MS) {
+        return null;
+      }
+      return parsed;
+    } catch {
+      return null;
+    }
+  }
+
+  private async write(instrumentToken: string, file: CacheFile) {
+    await mkdir(this.dir, { recursive: true });
+    await writeFileAtomic(this.filePath(instrumentToken), JSON.stringify(file));
+  }
+
+  private filePath(instrumentToken: string) {
+    return join(this.dir, `${encodeURIComponent(instrumentToken)}.json`);
+  }
+
+  private async withLock<T>(key: string, fn: () => Promise<T>): Promise<T> {
+    const prev = this.locks.get(key) ?? Promise.resolve();
+    const next = prev.catch(() => undefined).then(fn);
+    this.locks.set(key, next);
+    try {
+      return await next;
+    } finally {
+      if (this.locks.get(key) === next) {
+        this.locks.delete(key);
+      }
+    }
+  }
+}
+
+function candleDay(candle: DayCandle) {
+  // Kite day candles are stamped at IST midnight, e.g. 2024-06-03T00:00:00+0530.
+  return candle[0].slice(0, 10);
+}
+
+function todayIST() {
+  return new Date(Date.now() + IST_OFFSET_MS).toISOString().slice(0, 10);
+}
+
+function addDays(day: string, delta: number) {
+  const ms = Date.parse(`${day}T00:00:00Z`) + delta * DAY_MS;
+  return new Date(ms).toISOString().slice(0, 10);
+}
@@ -1,9 +1,18 @@
-import { MarketBar } from "../types.js";
+import { BarSeries, MarketBar } from "../types.js";
+import {
+  kiteApiBucket,
+  kiteHistoricalBucket,
+  kiteQuoteBucket,
+  TokenBucket
+} from "../utils/rate_limiter.js";
+import { TtlCache } from "../utils/ttl_cache.js";
+import { DayCandle, HistoricalBarCache } from "./historical_cache.js";
 
 export interface KiteHistoricalProviderConfig {
   apiKey: string;
   accessToken: string;
   baseUrl?: string;
+  cacheDir?: string;
 }
 
 export interface InstrumentRecord {
@@ -17,7 +26,7 @@ export interface InstrumentRecord {
 interface HistoricalResponse {
   status: string;
   data?: {
-    candles: [string, number, number, number, number, number][];
+    candles: DayCandle[];
   };
 }
 
@@ -26,96 +35,196 @@ interface QuoteResponse {
   data?: Record<string, { last_price: number; volume: number }>;
 }
 
+// The instrument dump is tens of MB and changes at most once a day, so the
+// parsed map is shared by every provider in the process. Holding the promise
+// also collapses concurrent first requests into one download. Created on
+// first use so the TTL is read after dotenv has loaded.
+let instrumentsCache: TtlCache<string, Promise<Map<string, InstrumentRecord>>> | null = null;
+
+function getInstrumentsCache() {
+  if (!instrumentsCache) {
+    instrumentsCache = new TtlCache(Number(process.env.KITE_INSTRUMENTS_CACHE_MS ?? "21600000"), 8);
+  }
+  return instrumentsCache;
+}
+
+// Filtered equity maps keyed by the instrument map they were built from.
+const equityViews = new WeakMap<
+  Map<string, InstrumentRecord>,
+  Map<string, InstrumentRecord>
+>();
+
+const sharedProviders = new Map<string, KiteHistoricalProvider>();
+
+// One provider per credential pair for the whole process, so pipeline runs,
+// backtests and UI screeners reuse the same bar-cache locks; a refreshed
+// token gets a fresh instance.
+export function getSharedHistoricalProvider(apiKey: string, accessToken: string) {
+  const key = `${apiKey}:${accessToken}`;
+  let provider = sharedProviders.get(key);
+  if (!provider) {
+    if (sharedProviders.size >= 4) {
+      const oldest = sharedProviders.keys().next();
+      if (!oldest.done) {
+        sharedProviders.delete(oldest.value);
+      }
+    }
+    provider = new KiteHistoricalProvider({ apiKey, accessToken });
+    sharedProviders.set(key, provider);
+  }
+  return provider;
+}
+
 export class KiteHistoricalProvider {
   private baseUrl: string;
-  private lastRequestTs = 0;
-  private readonly minGapMs = 120;
   private readonly maxRetries = 3;
+  private readonly barCache: HistoricalBarCache | null;
 
   constructor(private cfg: KiteHistoricalProviderConfig) {
     this.baseUrl = cfg.baseUrl ?? "https://api.kite.trade";
+    const cacheDir = cfg.cacheDir ?? process.env.HISTORICAL_CACHE_DIR ?? "";
+    this.barCache = cacheDir ? new HistoricalBarCache(cacheDir) : null;
   }
 
   async getInstruments(exchange = "NSE"): Promise<Map<string, InstrumentRecord>> {
-    const res = await this.requestWithRetry(`${this.baseUrl}/instruments/${exchange}`);
-
-    if (!res.ok) {
-      const body = await res.text();
-      throw new Error(`Kite instruments error ${res.status}: ${body}`);
+    const cache = getInstrumentsCache();
+    const key = `${this.baseUrl}|${exchange}`;
+    const cached = cache.get(key);
+    if (cached) {
+      return cached;
     }
+    // With a cache dir, each CLI process reuses today's parsed dump from disk
+    // instead of downloading it again.
+    const barCache = this.barCache;
+    const pending = barCache
+      ? barCache
+          .getDaily(`instruments-${encodeURIComponent(exchange)}`, async () =>
+            Array.from((await this.fetchInstruments(exchange)).values())
+          )
+          .then(
+            (records) => new Map<string, InstrumentRecord>(records.map((r) => [r.tradingsymbol, r]))
+          )
+      : this.fetchInstruments(exchange);
+    cache.set(key, pending);
+    pending.catch(() => cache.delete(key));
+    return pending;
+  }
 
-    const csv = await res.text();
-    const lines = csv.split(/\r?\n/).filter((line) => line.trim().length > 0);
-    if (lines.length < 2) {
-      throw new Error("Kite instruments response is empty");
+  // Cash-segment equities of an exchange (segment equal to the exchange,
+  // type EQ). The view is derived once per instrument map, so it refreshes
+  // together with the dump.
+  async getEquities(exchange = "NSE"): Promise<Map<string, InstrumentRecord>> {
+    const instruments = await this.getInstruments(exchange);
+    let equities = equityViews.get(instruments);
+    if (!equities) {
+      equities = new Map();
+      for (const [symbol, inst] of instruments) {
+        const isEquity =
+          inst.exchange === exchange && inst.segment === exchange && inst.instrumentType === "EQ";
+        if (isEquity) {
+          equities.set(symbol, inst);
+        }
+      }
+      equityViews.set(instruments, equities);
     }
+    return equities;
+  }
+
+  private async fetchInstruments(exchange: string): Promise<Map<string, InstrumentRecord>> {
+    const res = await this.requestWithRetry(
+      `${this.baseUrl}/instruments/${exchange}`,
+      kiteApiBucket()
+    );
 
-    const header = lines[0].split(",");
-    const tokenIdx = header.indexOf("instrument_token");
-    const symbolIdx = header.indexOf("tradingsymbol");
-    const exchangeIdx = header.indexOf("exchange");
-    const segmentIdx = header.indexOf("segment");
-    const instrumentTypeIdx = header.indexOf("instrument_type");
-
-    if (
-      tokenIdx < 0 ||
-      symbolIdx < 0 ||
-      exchangeIdx < 0 ||
-      segmentIdx < 0 ||
-      instrumentTypeIdx < 0
-    ) {
-      throw new Error("Kite instruments CSV missing expected columns");
+    if (!res.ok) {
+      const body = await res.text();
+      throw new Error(`Kite instruments error ${res.status}: ${body}`);
     }
 
+    // Parse line by line as the body streams in instead of holding the full
+    // dump plus an array of every line in memory.
+    let columns: InstrumentColumns | null = null;
+    let rowCount = 0;
     const map = new Map<string, InstrumentRecord>();
-    for (let i = 1; i < lines.length; i += 1) {
-      const cols = lines[i].split(",");
-      const tradingsymbol = cols[symbolIdx];
+    for await (const line of readLines(res)) {
+      if (line.trim().length === 0) {
+        continue;
+      }
+      if (!columns) {
+        columns = parseInstrumentHeader(line);
+        continue;
+      }
+      rowCount += 1;
+      const cols = line.split(",", columns.width);
+      const tradingsymbol = cols[columns.symbol];
       if (!tradingsymbol) {
         continue;
       }
 
       map.set(tradingsymbol, {
-        instrumentToken: cols[tokenIdx],
+        instrumentToken: cols[columns.token],
         tradingsymbol,
-        exchange: cols[exchangeIdx],
-        segment: cols[segmentIdx],
-        instrumentType: cols[instrumentTypeIdx]
+        exchange: cols[columns.exchange],
+        segment: cols[columns.segment],
+        instrumentType: cols[columns.instrumentType]
       });
     }
+    if (rowCount === 0) {
+      throw new Error("Kite instruments response is empty");
+    }
 
     return map;
   }
 
+  // Bars come back ascending by time with non-finite close/volume rows
+  // dropped, so callers can index them directly without re-sorting.
   async getHistoricalDayBars(
     instrumentToken: string,
     from: string,
     to: string
   ): Promise<MarketBar[]> {
+    return toMarketBars(instrumentToken, await this.loadDayCandles(instrumentToken, from, to));
+  }
+
+  // Same rows as getHistoricalDayBars, but as typed columns with no per-bar
+  // object, for callers that index or scan whole histories.
+  async getHistoricalDaySeries(
+    instrumentToken: string,
+    from: string,
+    to: string
+  ): Promise<BarSeries> {
+    return toBarSeries(instrumentToken, await this.loadDayCandles(instrumentToken, from, to));
+  }
+
+  private loadDayCandles(instrumentToken: string, from: string, to: string) {
+    return this.barCache
+      ? this.barCache.getCandles(instrumentToken, from, to, (rangeFrom, rangeTo) =>
+          this.fetchDayCandles(instrumentToken, rangeFrom, rangeTo)
+        )
+      : this.fetchDayCandles(instrumentToken, from, to);
+  }
+
+  private async fetchDayCandles(
+    instrumentToken: string,
+    from: string,
+    to: string
+  ): Promise<DayCandle[]> {
     const url = new URL(
       `${this.baseUrl}/instruments/historical/${instrumentToken}/day`
     );
     url.searchParams.set("from", from);
     url.searchParams.set("to", to);
 
-    const res = await this.requestWithRetry(url.toString());
+    const res = await this.requestWithRetry(url.toString(), kiteHistoricalBucket());
     if (!res.ok) {
       const body = await res.text();
       throw new Error(`Kite historical error ${res.status}: ${body}`);
     }
 
     const json = (await res.json()) as HistoricalResponse;
-    const candles = json.data?.candles ?? [];
-
-    return candles.map((candle) => ({
-      symbol: instrumentToken,
-      time: candle[0],
-      open: candle[1],
-      high: candle[2],
-      low: candle[3],
-      close: candle[4],
-      volume: candle[5]
-    }));
+    return (json.data?.candles ?? []).map(
+      (candle) => candle.slice(0, 6) as DayCandle
+    );
   }
 
   async getQuotes(
@@ -134,7 +243,7 @@ export class KiteHistoricalProvider {
         url.searchParams.append("i", key);
       }
 
-      const res = await this.requestWithRetry(url.toString());
+      const res = await this.requestWithRetry(url.toString(), kiteQuoteBucket());
       const json = (await res.json()) as QuoteResponse;
       const data = json.data ?? {};
       for (const [key, value] of Object.entries(data)) {
@@ -147,10 +256,10 @@ export class KiteHistoricalProvider {
     return out;
   }
 
-  private async requestWithRetry(url: string): Promise<Response> {
+  private async requestWithRetry(url: string, bucket: TokenBucket): Promise<Response> {
     let lastError: Error | null = null;
     for (let attempt = 1; attempt <= this.maxRetries; attempt += 1) {
-      await this.rateLimit();
+      await bucket.acquire();
       try {
         const res = await fetch(url, { headers: this.headers() });
         if (res.ok) {
@@ -174,15 +283,6 @@ export class KiteHistoricalProvider {
     throw lastError ?? new Error("Kite API request failed");
   }
 
-  private async rateLimit() {
-    const now = Date.now();
-    const waitMs = Math.max(0, this.minGapMs - (now - this.lastRequestTs));
-    if (waitMs > 0) {
-      await sleep(waitMs);
-    }
-    this.lastRequestTs = Date.now();
-  }
-
   private async backoff(attempt: number) {
     const jitter = Math.floor(Math.random() * 60);
     const delay = Math.min(1200, attempt * 200 + jitter);
@@ -197,6 +297,121 @@ export class KiteHistoricalProvider {
   }
 }
 
+// Candles with a finite close and volume, ascending by time. Kite returns
+// candles in order; only pay for a sort if it ever does not.
+function usableCandles(candles: DayCandle[]): DayCandle[] {
+  const rows: DayCandle[] = [];
+  let ascending = true;
+  let prevTime = "";
+  for (let i = 0; i < candles.length; i += 1) {
+    const candle = candles[i];
+    if (!Number.isFinite(candle[4]) || !Number.isFinite(candle[5])) {
+      continue;
+    }
+    if (candle[0] < prevTime) {
+      ascending = false;
+    }
+    prevTime = candle[0];
+    rows.push(candle);
+  }
+  if (!ascending) {
+    rows.sort((a, b) => (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0));
+  }
+  return rows;
+}
+
+function toMarketBars(symbol: string, candles: DayCandle[]): MarketBar[] {
+  const rows = usableCandles(candles);
+  const bars = new Array<MarketBar>(rows.length);
+  for (let i = 0; i < rows.length; i += 1) {
+    const [time, open, high, low, close, volume] = rows[i];
+    bars[i] = { symbol, time, open, high, low, close, volume };
+  }
+  return bars;
+}
+
+function toBarSeries(symbol: string, candles: DayCandle[]): BarSeries {
+  const rows = usableCandles(candles);
+  const n = rows.length;
+  const series: BarSeries = {
+    symbol,
+    time: new Array<string>(n),
+    open: new Float64Array(n),
+    high: new Float64Array(n),
+    low: new Float64Array(n),
+    close: new Float64Array(n),
+    volume: new Float64Array(n)
+  };
+  for (let i = 0; i < n; i += 1) {
+    const candle = rows[i];
+    series.time[i] = candle[0];
+    series.open[i] = candle[1];
+    series.high[i] = candle[2];
+    series.low[i] = candle[3];
+    series.close[i] = candle[4];
+    series.volume[i] = candle[5];
+  }
+  return series;
+}
+
+interface InstrumentColumns {
+  token: number;
+  symbol: number;
+  exchange: number;
+  segment: number;
+  instrumentType: number;
+  width: number;
+}
+
+function parseInstrumentHeader(line: string): InstrumentColumns {
+  const header = line.split(",");
+  const token = header.indexOf("instrument_token");
+  const symbol = header.indexOf("tradingsymbol");
+  const exchange = header.indexOf("exchange");
+  const segment = header.indexOf("segment");
+  const instrumentType = header.indexOf("instrument_type");
+
+  if (token < 0 || symbol < 0 || exchange < 0 || segment < 0 || instrumentType < 0) {
+    throw new Error("Kite instruments CSV missing expected columns");
+  }
+  // Columns past the last one we read are never split out.
+  const width = Math.max(token, symbol, exchange, segment, instrumentType) + 1;
+  return { token, symbol, exchange, segment, instrumentType, width };
+}
+
+async function* readLines(res: Response): AsyncGenerator<string> {
+  if (!res.body) {
+    yield* (await res.text()).split(/\r?\n/);
+    return;
+  }
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let pending = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    pending += decoder.decode(value, { stream: true });
+    let start = 0;
+    let newline = pending.indexOf("\n", start);
+    while (newline >= 0) {
+      yield stripCr(pending.slice(start, newline));
+      start = newline + 1;
+      newline = pending.indexOf("\n", start);
+    }
+    pending = pending.slice(start);
+  }
+  pending += decoder.decode();
+  if (pending.length > 0) {
+    yield stripCr(pending);
+  }
+}
+
+function stripCr(line: string) {
+  return line.endsWith("\r") ? line.slice(0, -1) : line;
+}
+
 function sleep(ms: number): Promise<void> {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
@@ -1,3 +1,4 @@
+import { kiteQuoteBucket } from "../utils/rate_limiter.js";
 import { LtpProvider } from "./ltp_provider.js";
 
 export interface KiteLtpProviderConfig {
@@ -18,9 +19,44 @@ export class KiteLtpProvider implements LtpProvider {
 
   async getLtp(symbol: string): Promise<number> {
     const key = this.toInstrumentKey(symbol);
+    const data = await this.fetchLtpData([key]);
+    const ltp = data[key]?.last_price;
+    if (ltp === undefined) {
+      throw new Error(`LTP missing for ${key}`);
+    }
+    return ltp;
+  }
+
+  async getLtps(symbols: string[]): Promise<Map<string, number>> {
+    const out = new Map<string, number>();
+    // Build the instrument key once per symbol and map responses back through
+    // it, rather than re-deriving keys while reading each batch.
+    const symbolByKey = new Map<string, string>();
+    for (const symbol of symbols) {
+      symbolByKey.set(this.toInstrumentKey(symbol), symbol);
+    }
+    const keys = Array.from(symbolByKey.keys());
+    // /quote/ltp accepts up to 1000 instruments per request.
+    const batchSize = 500;
+    for (let i = 0; i < keys.length; i += batchSize) {
+      const data = await this.fetchLtpData(keys.slice(i, i + batchSize));
+      for (const [key, quote] of Object.entries(data)) {
+        const symbol = symbolByKey.get(key);
+        if (symbol !== undefined && quote?.last_price !== undefined) {
+          out.set(symbol, quote.last_price);
+        }
+      }
+    }
+    return out;
+  }
+
+  private async fetchLtpData(keys: string[]) {
     const url = new URL(`${this.baseUrl}/quote/ltp`);
-    url.searchParams.append("i", key);
+    for (const key of keys) {
+      url.searchParams.append("i", key);
+    }
 
+    await kiteQuoteBucket().acquire();
     const res = await fetch(url.toString(), {
       headers: {
         "X-Kite-Version": "3",
@@ -37,12 +73,7 @@ export class KiteLtpProvider implements LtpProvider {
       status: string;
       data?: Record<string, { last_price: number }>;
     };
-
-    const ltp = json.data?.[key]?.last_price;
-    if (ltp === undefined) {
-      throw new Error(`LTP missing for ${key}`);
-    }
-    return ltp;
+    return json.data ?? {};
   }
 
   private toInstrumentKey(symbol: string): string {
@@ -0,0 +1,212 @@
+import { getSharedHistoricalProvider, KiteHistoricalProvider } from "./kite_historical_provider.js";
+import { LtpProvider } from "./ltp_provider.js";
+
+export interface KiteTickerLtpProviderConfig {
+  apiKey: string;
+  accessToken: string;
+  fallback: LtpProvider; // used until a symbol's first tick arrives
+  wsUrl?: string; // default wss://ws.kite.trade
+}
+
+// Streams last prices from the Kite ticker into memory so repeated monitor
+// passes read LTPs locally instead of polling /quote. Symbols subscribe on
+// first lookup; until their first tick (or while the socket is down) the
+// HTTP fallback answers.
+export class KiteTickerLtpProvider implements LtpProvider {
+  private socket: WebSocket | null = null;
+  private connected = false;
+  private closed = false;
+  private reconnectDelayMs = 1000;
+  private reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+  private readonly instruments: KiteHistoricalProvider;
+  private readonly tokenBySymbol = new Map<string, number>();
+  private readonly symbolByToken = new Map<number, string>();
+  private readonly prices = new Map<string, number>();
+
+  constructor(private cfg: KiteTickerLtpProviderConfig) {
+    this.instruments = getSharedHistoricalProvider(cfg.apiKey, cfg.accessToken);
+  }
+
+  async getLtp(symbol: string): Promise<number> {
+    const price = this.cachedPrice(symbol);
+    if (price !== undefined) {
+      return price;
+    }
+    void this.subscribe([symbol]);
+    return this.cfg.fallback.getLtp(symbol);
+  }
+
+  async getLtps(symbols: string[]): Promise<Map<string, number>> {
+    const out = new Map<string, number>();
+    const misses: string[] = [];
+    for (const symbol of symbols) {
+      const price = this.cachedPrice(symbol);
+      if (price !== undefined) {
+        out.set(symbol, price);
+      } else {
+        misses.push(symbol);
+      }
+    }
+    if (misses.length > 0) {
+      void this.subscribe(misses);
+      for (const [symbol, price] of await this.cfg.fallback.getLtps(misses)) {
+        out.set(symbol, price);
+      }
+    }
+    return out;
+  }
+
+  close() {
+    this.closed = true;
+    if (this.reconnectTimer) {
+      clearTimeout(this.reconnectTimer);
+      this.reconnectTimer = null;
+    }
+    this.socket?.close();
+    this.socket = null;
+    this.connected = false;
+    this.prices.clear();
+  }
+
+  private cachedPrice(symbol: string) {
+    return this.connected ? this.prices.get(symbol) : undefined;
+  }
+
+  private async subscribe(symbols: string[]) {
+    if (this.closed) {
+      return;
+    }
+    try {
+      const pending = symbols.filter((symbol) => !this.tokenBySymbol.has(symbol));
+      if (pending.length > 0) {
+        const instruments = await this.instruments.getInstruments("NSE");
+        const added: number[] = [];
+        for (const symbol of pending) {
+          const token = Number(instruments.get(symbol)?.instrumentToken);
+          if (Number.isInteger(token) && token > 0 && !this.tokenBySymbol.has(symbol)) {
+            this.tokenBySymbol.set(symbol, token);
+            this.symbolByToken.set(token, symbol);
+            added.push(token);
+          }
+        }
+        this.sendSubscribe(added);
+      }
+      this.connect();
+    } catch (err) {
+      const message = err instanceof Error ? err.message : String(err);
+      console.warn("KITE_TICKER_SUBSCRIBE_FAILED", message);
+    }
+  }
+
+  private connect() {
+    if (this.socket || this.closed || this.symbolByToken.size === 0) {
+      return;
+    }
+    const url = new URL(this.cfg.wsUrl ?? "wss://ws.kite.trade");
+    url.searchParams.set("api_key", this.cfg.apiKey);
+    url.searchParams.set("access_token", this.cfg.accessToken);
+
+    const socket = new WebSocket(url.toString());
+    socket.binaryType = "arraybuffer";
+    socket.addEventListener("open", () => {
+      this.connected = true;
+      this.reconnectDelayMs = 1000;
+      this.sendSubscribe(Array.from(this.symbolByToken.keys()));
+    });
+    socket.addEventListener("message", (event) => {
+      if (event.data instanceof ArrayBuffer) {
+        this.onBinary(event.data);
+      } else if (typeof event.data === "string") {
+        this.onText(event.data);
+      }
+    });
+    // "error" is always followed by "close", which handles the reconnect.
+    socket.addEventListener("error", () => undefined);
+    socket.addEventListener("close", () => this.onClose(socket));
+    this.socket = socket;
+  }
+
+  private onClose(socket: WebSocket) {
+    if (this.socket !== socket) {
+      return;
+    }
+    this.socket = null;
+    this.connected = false;
+    // Never serve prices that stopped updating.
+    this.prices.clear();
+    if (this.closed) {
+      return;
+    }
+    this.reconnectTimer = setTimeout(() => {
+      this.reconnectTimer = null;
+      this.connect();
+    }, this.reconnectDelayMs);
+    this.reconnectDelayMs = Math.min(30_000, this.reconnectDelayMs * 2);
+  }
+
+  private sendSubscribe(tokens: number[]) {
+    if (!this.connected || !this.socket || tokens.length === 0) {
+      return;
+    }
+    this.socket.send(JSON.stringify({ a: "subscribe", v: tokens }));
+    this.socket.send(JSON.stringify({ a: "mode", v: ["ltp", tokens] }));
+  }
+
+  // Binary frame: uint16 packet count, then per packet a uint16 length and
+  // the packet; LTP-mode packets are uint32 token + int32 price in paise.
+  // Single-byte frames are heartbeats.
+  private onBinary(buffer: ArrayBuffer) {
+    if (buffer.byteLength < 2) {
+      return;
+    }
+    const view = new DataView(buffer);
+    const count = view.getUint16(0);
+    let offset = 2;
+    for (let i = 0; i < count && offset + 2 <= buffer.byteLength; i += 1) {
+      const length = view.getUint16(offset);
+      offset += 2;
+      if (length >= 8 && offset + length <= buffer.byteLength) {
+        const symbol = this.symbolByToken.get(view.getUint32(offset));
+        if (symbol) {
+          this.prices.set(symbol, view.getInt32(offset + 4) / 100);
+        }
+      }
+      offset += length;
+    }
+  }
+
+  private onText(raw: string) {
+    try {
+      const message = JSON.parse(raw) as { type?: string; data?: unknown };
+      if (message.type === "error") {
+        console.warn("KITE_TICKER_ERROR", String(message.data ?? ""));
+      }
+    } catch {
+      // Ignore non-JSON text frames.
+    }
+  }
+}
+
+let sharedTicker: { accessToken: string; provider: KiteTickerLtpProvider } | null = null;
+
+// One ticker connection per process, reused across pipeline runtimes so the
+// live loop keeps its subscriptions between monitor passes. Returns null
+// when this Node build has no WebSocket client.
+export function getSharedKiteTicker(cfg: KiteTickerLtpProviderConfig) {
+  if (typeof WebSocket === "undefined") {
+    return null;
+  }
+  if (sharedTicker && sharedTicker.accessToken !== cfg.accessToken) {
+    sharedTicker.provider.close();
+    sharedTicker = null;
+  }
+  if (!sharedTicker) {
+    sharedTicker = { accessToken: cfg.accessToken, provider: new KiteTickerLtpProvider(cfg) };
+  }
+  return sharedTicker.provider;
+}
+
+export function closeSharedKiteTicker() {
+  sharedTicker?.provider.close();
+  sharedTicker = null;
+}
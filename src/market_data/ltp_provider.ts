@@ -1,5 +1,7 @@
 export interface LtpProvider {
   getLtp(symbol: string): Promise<number>;
+  // Symbols without a price are left out of the result rather than throwing.
+  getLtps(symbols: string[]): Promise<Map<string, number>>;
 }
 
 export class MapLtpProvider implements LtpProvider {
@@ -12,4 +14,15 @@ export class MapLtpProvider implements LtpProvider {
     }
     return price;
   }
+
+  async getLtps(symbols: string[]): Promise<Map<string, number>> {
+    const out = new Map<string, number>();
+    for (const symbol of symbols) {
+      const price = this.ltpMap.get(symbol);
+      if (price !== undefined) {
+        out.set(symbol, price);
+      }
+    }
+    return out;
+  }
 }
@@ -17,8 +17,10 @@ export class PositionMonitor {
     private persistence: Persistence
   ) {}
 
-  async hydrate(): Promise<void> {
-    const persisted = await this.persistence.loadManagedPositions();
+  // Callers that already loaded the managed rows (e.g. alongside positions)
+  // pass them in to skip a second query.
+  async hydrate(records?: ManagedPositionRecord[]): Promise<void> {
+    const persisted = records ?? (await this.persistence.loadManagedPositions());
     for (const record of persisted) {
       this.managed.set(record.symbol, record);
     }
@@ -50,72 +52,95 @@ export class PositionMonitor {
     if (this.exec.isLiveMode() && process.env.GTT_PROTECTION_ENABLED !== "0") {
       return;
     }
-    for (const position of Array.from(this.managed.values())) {
+    const openSymbols: string[] = [];
+    for (const position of this.managed.values()) {
       const current = this.store.positions.get(position.symbol);
-      if (!current || current.qty <= 0) {
-        this.managed.delete(position.symbol);
-        await this.persistence.deleteManagedPosition(position.symbol);
-        continue;
+      if (current && current.qty > 0) {
+        openSymbols.push(position.symbol);
       }
+    }
+    // One quote round-trip for every open position instead of one per symbol.
+    const ltps = openSymbols.length > 0 ? await this.exec.getLtps(openSymbols) : new Map();
 
-      const ltp = await this.exec.getLtp(position.symbol);
-      if (ltp > position.highestPrice) {
-        position.highestPrice = ltp;
-      }
+    // Managed-position writes are collected and flushed once per pass,
+    // including when an order call throws part way through.
+    const changed = new Map<string, ManagedPositionRecord>();
+    const removed = new Set<string>();
+    try {
+      for (const position of Array.from(this.managed.values())) {
+        const current = this.store.positions.get(position.symbol);
+        if (!current || current.qty <= 0) {
+          this.managed.delete(position.symbol);
+          removed.add(position.symbol);
+          continue;
+        }
 
-      const trailingStop = position.highestPrice - position.atr14 * this.trailingAtrMultiple;
-      position.stopPrice = Math.max(position.stopPrice, trailingStop);
-      this.managed.set(position.symbol, position);
-      await this.persistence.upsertManagedPosition(position);
+        const ltp = ltps.get(position.symbol) ?? (await this.exec.getLtp(position.symbol));
+        if (ltp > position.highestPrice) {
+          position.highestPrice = ltp;
+        }
 
-      if (ltp > position.stopPrice) {
-        continue;
-      }
+        const trailingStop = position.highestPrice - position.atr14 * this.trailingAtrMultiple;
+        position.stopPrice = Math.max(position.stopPrice, trailingStop);
+        this.managed.set(position.symbol, position);
+        changed.set(position.symbol, position);
 
-      const intent: OrderIntent = {
-        idempotencyKey: `STOP-${position.symbol}-${Date.now()}`,
-        symbol: position.symbol,
-        side: "SELL",
-        qty: current.qty,
-        type: "MARKET",
-        timeInForce: "DAY",
-        createdAt: new Date().toISOString(),
-        signalReason: `Trailing stop hit at ${position.stopPrice.toFixed(2)}`
-      };
+        if (ltp > position.stopPrice) {
+          continue;
+        }
 
-      const order = await this.oms.createOrder(intent);
-      await this.oms.updateState(order.orderId, "OPEN");
-      const fill = await this.exec.placeOrder(order);
-      await this.oms.updateState(order.orderId, "FILLED", {
-        filledQty: fill.qty,
-        avgFillPrice: fill.price
-      });
-      await this.portfolio.applyFill(fill);
-      await this.persistence.closeTradeEntryLots(
-        fill.symbol,
-        fill.qty,
-        fill.price,
-        fill.time
-      );
-      this.managed.delete(position.symbol);
-      await this.persistence.deleteManagedPosition(position.symbol);
-      console.log(
-        "STOP_EXIT",
-        fill.symbol,
-        fill.qty,
-        fill.price.toFixed(2),
-        `stop=${position.stopPrice.toFixed(2)}`
-      );
+        const now = new Date();
+        const intent: OrderIntent = {
+          idempotencyKey: `STOP-${position.symbol}-${now.getTime()}`,
+          symbol: position.symbol,
+          side: "SELL",
+          qty: current.qty,
+          type: "MARKET",
+          timeInForce: "DAY",
+          createdAt: now.toISOString(),
+          signalReason: `Trailing stop hit at ${position.stopPrice.toFixed(2)}`
+        };
+
+        const order = await this.oms.createOrder(intent);
+        await this.oms.updateState(order.orderId, "OPEN");
+        const fill = await this.exec.placeOrder(order);
+        await this.oms.updateState(order.orderId, "FILLED", {
+          filledQty: fill.qty,
+          avgFillPrice: fill.price
+        });
+        await this.portfolio.applyFill(fill);
+        await this.persistence.closeTradeEntryLots(
+          fill.symbol,
+          fill.qty,
+          fill.price,
+          fill.time
+        );
+        this.managed.delete(position.symbol);
+        changed.delete(position.symbol);
+        removed.add(position.symbol);
+        console.log(
+          "STOP_EXIT",
+          fill.symbol,
+          fill.qty,
+          fill.price.toFixed(2),
+          `stop=${position.stopPrice.toFixed(2)}`
+        );
+      }
+    } finally {
+      await this.persistence.deleteManagedPositions(Array.from(removed));
+      await this.persistence.upsertManagedPositions(Array.from(changed.values()));
     }
   }
 
   async reconcileWithPositions() {
+    const removed: string[] = [];
     for (const [symbol] of Array.from(this.managed.entries())) {
       const position = this.store.positions.get(symbol);
       if (!position || position.qty <= 0) {
         this.managed.delete(symbol);
-        await this.persistence.deleteManagedPosition(symbol);
+        removed.push(symbol);
       }
     }
+    await this.persistence.deleteManagedPositions(removed);
   }
 }
@@ -28,12 +28,27 @@ type SchedulerHandlers = {
   canRun: () => boolean;
 };
 
+const IST_OFFSET_MS = 330 * 60 * 1000;
+const MINUTE_MS = 60 * 1000;
+const DAY_MS = 24 * 60 * MINUTE_MS;
+const WEEKDAYS = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"];
+// Upper bound on one sleep, so clock changes are picked up within the hour.
+const MAX_SLEEP_MINUTES = 60;
+
 export class TradingScheduler {
   private timer: NodeJS.Timeout | null = null;
-  private lastTickBucket = "";
+  private lastTickMinute = -1;
+  private readonly runningJobs = new Set<SchedulerJobName>();
+  private retryPending = false;
   private seenKeys = new Set<string>();
+  private seenDate = "";
   private lastRuns: SchedulerState["lastRuns"] = {};
   private lastErrors: SchedulerState["lastErrors"] = {};
+  // Configured "HH:MM" times as minutes past midnight IST, parsed once.
+  private readonly premarketMinute: number;
+  private readonly eodMinute: number;
+  private readonly backtestMinute: number;
+  private readonly strategyLabMinute: number;
 
   constructor(
     private handlers: SchedulerHandlers,
@@ -47,26 +62,95 @@ export class TradingScheduler {
       strategyLabAt: string;
       strategyLabWeekday: string;
     }
-  ) {}
+  ) {
+    this.premarketMinute = minutesOf(cfg.premarketAt);
+    this.eodMinute = minutesOf(cfg.eodAt);
+    this.backtestMinute = minutesOf(cfg.backtestAt);
+    this.strategyLabMinute = minutesOf(cfg.strategyLabAt);
+  }
 
   start() {
     if (this.timer) {
       return;
     }
-    this.timer = setInterval(() => {
-      void this.tick();
-    }, Math.max(5, this.cfg.tickSeconds) * 1000);
-    void this.tick();
+    this.wake();
   }
 
   stop() {
     if (!this.timer) {
       return;
     }
-    clearInterval(this.timer);
+    clearTimeout(this.timer);
     this.timer = null;
   }
 
+  // Sleep straight to the next minute in which some job could fire instead
+  // of polling. While a job is running or was deferred by canRun(), poll
+  // every tickSeconds so the deferred job is retried as before.
+  private wake() {
+    const delayMs =
+      this.runningJobs.size > 0 || this.retryPending
+        ? this.pollMs()
+        : this.msUntilNextCandidate(Date.now());
+    this.timer = setTimeout(() => this.wake(), delayMs);
+    void this.tick();
+  }
+
+  // The sleep is armed before tick() runs, so a job deferred during that
+  // tick shortens it here; otherwise the retry would wait for the next
+  // candidate minute and skip the deferred bucket entirely.
+  private pollSoon() {
+    if (!this.timer) {
+      return;
+    }
+    clearTimeout(this.timer);
+    this.timer = setTimeout(() => this.wake(), this.pollMs());
+  }
+
+  private pollMs() {
+    return Math.max(5, this.cfg.tickSeconds) * 1000;
+  }
+
+  private msUntilNextCandidate(nowMs: number) {
+    const startOfMinute = Math.floor(nowMs / MINUTE_MS) * MINUTE_MS;
+    let candidate = startOfMinute + MINUTE_MS;
+    for (let i = 1; i < MAX_SLEEP_MINUTES; i += 1) {
+      if (this.mayFireAt(candidate)) {
+        break;
+      }
+      candidate += MINUTE_MS;
+    }
+    // Land just after the minute boundary so the tick sees the new minute.
+    return candidate - nowMs + 50;
+  }
+
+  private mayFireAt(minuteStartMs: number) {
+    const istMs = minuteStartMs + IST_OFFSET_MS;
+    const minuteOfDay = Math.floor(istMs / MINUTE_MS) % (24 * 60);
+    const weekday = WEEKDAYS[(Math.floor(istMs / DAY_MS) + 4) % 7];
+    const isWeekday = weekday !== "Sat" && weekday !== "Sun";
+    if (isWeekday) {
+      if (minuteOfDay === this.premarketMinute || minuteOfDay === this.eodMinute) {
+        return true;
+      }
+      if (inMonitorWindow(minuteOfDay)) {
+        // First minute of the window, or a monitor bucket started during the
+        // minute just ended.
+        const intervalMs = this.cfg.monitorIntervalSeconds * 1000;
+        const bucketChanged =
+          Math.floor(minuteStartMs / intervalMs) !==
+          Math.floor((minuteStartMs - MINUTE_MS) / intervalMs);
+        if (minuteOfDay === MONITOR_START_MINUTE || bucketChanged) {
+          return true;
+        }
+      }
+    }
+    return (
+      (weekday === this.cfg.backtestWeekday && minuteOfDay === this.backtestMinute) ||
+      (weekday === this.cfg.strategyLabWeekday && minuteOfDay === this.strategyLabMinute)
+    );
+  }
+
   isRunning() {
     return Boolean(this.timer);
   }
@@ -90,92 +174,89 @@ export class TradingScheduler {
   private async tick() {
     const now = new Date();
     const p = partsIST(now);
-    const minuteKey = `${p.date} ${p.hour}:${p.minute}`;
-    if (minuteKey === this.lastTickBucket) {
+    if (p.minute === this.lastTickMinute) {
       return;
     }
-    this.lastTickBucket = minuteKey;
+    this.lastTickMinute = p.minute;
+    this.retryPending = false;
+    // Every dedupe key is scoped to an IST date or to a monitor bucket inside
+    // that day's window, so keys from earlier days can never match again.
+    if (p.date !== this.seenDate) {
+      this.seenDate = p.date;
+      this.seenKeys.clear();
+    }
 
-    const isWeekday = ["Mon", "Tue", "Wed", "Thu", "Fri"].includes(p.weekday);
-    if (isWeekday && atTime(p, this.cfg.premarketAt)) {
+    const minuteOfDay = p.minuteOfDay;
+    const isWeekday = p.weekday !== "Sat" && p.weekday !== "Sun";
+    if (isWeekday && minuteOfDay === this.premarketMinute) {
       await this.tryRun("morning", `morning:${p.date}`, this.handlers.runMorning);
     }
 
-    if (isWeekday && inMonitorWindow(p)) {
+    if (isWeekday && inMonitorWindow(minuteOfDay)) {
       const bucket = Math.floor(now.getTime() / (this.cfg.monitorIntervalSeconds * 1000));
       await this.tryRun("monitor", `monitor:${bucket}`, this.handlers.runMonitor);
     }
 
-    if (isWeekday && atTime(p, this.cfg.eodAt)) {
+    if (isWeekday && minuteOfDay === this.eodMinute) {
       await this.tryRun("eod_close", `eod:${p.date}`, this.handlers.runEodClose);
     }
 
-    if (p.weekday === this.cfg.backtestWeekday && atTime(p, this.cfg.backtestAt)) {
+    if (p.weekday === this.cfg.backtestWeekday && minuteOfDay === this.backtestMinute) {
       await this.tryRun("backtest", `backtest:${p.date}`, this.handlers.runBacktest);
     }
 
-    if (p.weekday === this.cfg.strategyLabWeekday && atTime(p, this.cfg.strategyLabAt)) {
+    if (p.weekday === this.cfg.strategyLabWeekday && minuteOfDay === this.strategyLabMinute) {
       await this.tryRun("strategy_lab", `strategy-lab:${p.date}`, this.handlers.runStrategyLab);
     }
   }
 
+  // Each job is single-flight: a monitor pass that outlives its bucket is
+  // not stacked with the next one; that bucket is retried once it finishes.
   private async tryRun(job: SchedulerJobName, dedupeKey: string, fn: () => Promise<void>) {
     if (this.seenKeys.has(dedupeKey)) {
       return;
     }
-    if (!this.handlers.canRun()) {
+    if (this.runningJobs.has(job) || !this.handlers.canRun()) {
+      this.retryPending = true;
+      this.pollSoon();
       return;
     }
     this.seenKeys.add(dedupeKey);
+    this.runningJobs.add(job);
     try {
       await fn();
       this.lastRuns[job] = new Date().toISOString();
       delete this.lastErrors[job];
     } catch (err) {
       this.lastErrors[job] = err instanceof Error ? err.message : String(err);
+    } finally {
+      this.runningJobs.delete(job);
     }
   }
 }
 
-function inMonitorWindow(p: {
-  weekday: string;
-  hour: string;
-  minute: string;
-}) {
-  const totalMinutes = Number(p.hour) * 60 + Number(p.minute);
-  return totalMinutes >= 9 * 60 + 20 && totalMinutes <= 15 * 60 + 25;
+const MONITOR_START_MINUTE = 9 * 60 + 20;
+const MONITOR_END_MINUTE = 15 * 60 + 25;
+
+function inMonitorWindow(minuteOfDay: number) {
+  return minuteOfDay >= MONITOR_START_MINUTE && minuteOfDay <= MONITOR_END_MINUTE;
 }
 
-function atTime(
-  p: {
-    hour: string;
-    minute: string;
-  },
-  hhmm: string
-) {
-  const [h, m] = hhmm.split(":").map((x) => x.trim());
-  return p.hour === h?.padStart(2, "0") && p.minute === m?.padStart(2, "0");
+// "HH:MM" as minutes past midnight; -1 for values that can never match.
+function minutesOf(hhmm: string) {
+  const [h, m] = hhmm.split(":").map((x) => Number(x.trim()));
+  return Number.isInteger(h) && Number.isInteger(m) ? h * 60 + m : -1;
 }
 
+// IST is a fixed UTC+05:30 with no DST, so the calendar fields come from
+// plain arithmetic on the epoch instead of an Intl formatter per tick.
 function partsIST(now: Date) {
-  const parts = new Intl.DateTimeFormat("en-GB", {
-    timeZone: "Asia/Kolkata",
-    hour12: false,
-    weekday: "short",
-    year: "numeric",
-    month: "2-digit",
-    day: "2-digit",
-    hour: "2-digit",
-    minute: "2-digit"
-  }).formatToParts(now);
-  const get = (type: string) => parts.find((x) => x.type === type)?.value ?? "";
+  const istMs = now.getTime() + IST_OFFSET_MS;
+  const minute = Math.floor(istMs / MINUTE_MS);
   return {
-    weekday: get("weekday"),
-    year: get("year"),
-    month: get("month"),
-    day: get("day"),
-    hour: get("hour"),
-    minute: get("minute"),
-    date: `${get("year")}-${get("month")}-${get("day")}`
+    weekday: WEEKDAYS[(Math.floor(istMs / DAY_MS) + 4) % 7],
+    date: new Date(istMs).toISOString().slice(0, 10),
+    minute,
+    minuteOfDay: minute % (24 * 60)
   };
 }
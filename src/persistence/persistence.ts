@@ -139,11 +139,19 @@ export interface Persistence {
   upsertOrder(order: Order): Promise<void>;
   insertFill(fill: Fill): Promise<void>;
   upsertPosition(position: Position): Promise<void>;
+  upsertPositions(positions: Position[]): Promise<void>;
   deletePosition(symbol: string): Promise<void>;
+  deletePositions(symbols: string[]): Promise<void>;
   upsertManagedPosition(position: ManagedPositionRecord): Promise<void>;
+  upsertManagedPositions(positions: ManagedPositionRecord[]): Promise<void>;
   deleteManagedPosition(symbol: string): Promise<void>;
+  deleteManagedPositions(symbols: string[]): Promise<void>;
   loadPositions(): Promise<Position[]>;
   loadManagedPositions(): Promise<ManagedPositionRecord[]>;
+  loadPositionsWithManaged(): Promise<{
+    positions: Position[];
+    managed: ManagedPositionRecord[];
+  }>;
   recordTradeEntryLot(
     symbol: string,
     qty: number,
@@ -178,6 +186,9 @@ export interface Persistence {
   insertStrategyLabCandidate(
     candidate: Omit<StrategyLabCandidateRecord, "id" | "createdAt">
   ): Promise<void>;
+  insertStrategyLabCandidates(
+    candidates: Array<Omit<StrategyLabCandidateRecord, "id" | "createdAt">>
+  ): Promise<void>;
   upsertStrategyLabRecommendation(
     rec: Omit<StrategyLabRecommendationRecord, "id" | "createdAt">
   ): Promise<void>;
@@ -204,15 +215,25 @@ export class NoopPersistence implements Persistence {
   async upsertOrder(_order: Order): Promise<void> {}
   async insertFill(_fill: Fill): Promise<void> {}
   async upsertPosition(_position: Position): Promise<void> {}
+  async upsertPositions(_positions: Position[]): Promise<void> {}
   async deletePosition(_symbol: string): Promise<void> {}
+  async deletePositions(_symbols: string[]): Promise<void> {}
   async upsertManagedPosition(_position: ManagedPositionRecord): Promise<void> {}
+  async upsertManagedPositions(_positions: ManagedPositionRecord[]): Promise<void> {}
   async deleteManagedPosition(_symbol: string): Promise<void> {}
+  async deleteManagedPositions(_symbols: string[]): Promise<void> {}
   async loadPositions(): Promise<Position[]> {
     return [];
   }
   async loadManagedPositions(): Promise<ManagedPositionRecord[]> {
     return [];
   }
+  async loadPositionsWithManaged(): Promise<{
+    positions: Position[];
+    managed: ManagedPositionRecord[];
+  }> {
+    return { positions: [], managed: [] };
+  }
   async recordTradeEntryLot(
     _symbol: string,
     _qty: number,
@@ -263,6 +284,9 @@ export class NoopPersistence implements Persistence {
   async insertStrategyLabCandidate(
     _candidate: Omit<StrategyLabCandidateRecord, "id" | "createdAt">
   ): Promise<void> {}
+  async insertStrategyLabCandidates(
+    _candidates: Array<Omit<StrategyLabCandidateRecord, "id" | "createdAt">>
+  ): Promise<void> {}
   async upsertStrategyLabRecommendation(
     _rec: Omit<StrategyLabRecommendationRecord, "id" | "createdAt">
   ): Promise<void> {}
@@ -15,28 +15,73 @@ import {
 } from "./persistence.js";
 import { ReconcileAudit } from "./persistence.js";
 
+const pools = new Map<string, Pool>();
+const schemaReady = new Map<Pool, Promise<void>>();
+
+// Bump whenever the DDL in ensureSchema changes so existing databases pick
+// the change up on their next init.
+const SCHEMA_VERSION = "1";
+
+// One pool per database URL for the whole process, shared by persistence and
+// the UI's ad-hoc read queries, so requests reuse warm connections instead of
+// paying a TCP/TLS/auth handshake each time.
+export function getPostgresPool(databaseUrl: string): Pool {
+  const key = databaseUrl.trim();
+  const existing = pools.get(key);
+  if (existing) {
+    return existing;
+  }
+  const pool = new Pool({
+    connectionString: key,
+    max: Number(process.env.PG_POOL_MAX ?? "10"),
+    idleTimeoutMillis: Number(process.env.PG_IDLE_TIMEOUT_MS ?? "30000"),
+    connectionTimeoutMillis: Number(process.env.PG_CONNECT_TIMEOUT_MS ?? "5000")
+  });
+  pools.set(key, pool);
+  return pool;
+}
+
+export async function closePostgresPools(): Promise<void> {
+  const open = Array.from(pools.values());
+  pools.clear();
+  schemaReady.clear();
+  await Promise.all(open.map((pool) => pool.end()));
+}
+
 export class PostgresPersistence implements Persistence {
   private pool: Pool;
-  private static pools = new Map<string, Pool>();
 
   constructor(databaseUrl: string) {
-    const key = databaseUrl.trim();
-    const existing = PostgresPersistence.pools.get(key);
-    if (existing) {
-      this.pool = existing;
-      return;
-    }
-    const pool = new Pool({
-      connectionString: key,
-      max: Number(process.env.PG_POOL_MAX ?? "10"),
-      idleTimeoutMillis: Number(process.env.PG_IDLE_TIMEOUT_MS ?? "30000"),
-      connectionTimeoutMillis: Number(process.env.PG_CONNECT_TIMEOUT_MS ?? "5000")
-    });
-    PostgresPersistence.pools.set(key, pool);
-    this.pool = pool;
+    this.pool = getPostgresPool(databaseUrl);
   }
 
+  // Runs the DDL at most once per pool, and skips it entirely when the
+  // database already records the current schema version.
   async init(): Promise<void> {
+    let ready = schemaReady.get(this.pool);
+    if (!ready) {
+      ready = this.ensureSchema();
+      schemaReady.set(this.pool, ready);
+      ready.catch(() => schemaReady.delete(this.pool));
+    }
+    await ready;
+  }
+
+  private async ensureSchema(): Promise<void> {
+    try {
+      const { rows } = await this.pool.query<{ value: string }>(
+        `SELECT value FROM system_state WHERE key = 'schema_version'`
+      );
+      if (rows[0]?.value === SCHEMA_VERSION) {
+        return;
+      }
+    } catch (err) {
+      // 42P01: system_state does not exist yet on a fresh database.
+      if ((err as { code?: string }).code !== "42P01") {
+        throw err;
+      }
+    }
+
     await this.pool.query(`
       CREATE TABLE IF NOT EXISTS orders (
         order_id TEXT PRIMARY KEY,
@@ -222,11 +267,15 @@ export class PostgresPersistence implements Persistence {
       CREATE INDEX IF NOT EXISTS idx_gtt_protections_status
       ON gtt_protections (status, updated_at DESC);
     `);
+    await this.upsertSystemState("schema_version", SCHEMA_VERSION);
   }
 
+  // Hot write paths use named statements, so each pooled connection parses
+  // and plans them once and later calls only send parameters.
   async upsertOrder(order: Order): Promise<void> {
-    await this.pool.query(
-      `
+    await this.pool.query({
+      name: "upsert_order",
+      text: `
       INSERT INTO orders (
         order_id, symbol, side, qty, order_type, state, filled_qty, avg_fill_price,
         idempotency_key, signal_reason, created_at, updated_at
@@ -239,7 +288,7 @@ export class PostgresPersistence implements Persistence {
         avg_fill_price = EXCLUDED.avg_fill_price,
         updated_at = EXCLUDED.updated_at
       `,
-      [
+      values: [
         order.orderId,
         order.intent.symbol,
         order.intent.side,
@@ -253,22 +302,24 @@ export class PostgresPersistence implements Persistence {
         order.createdAt,
         order.updatedAt
       ]
-    );
+    });
   }
 
   async insertFill(fill: Fill): Promise<void> {
-    await this.pool.query(
-      `
+    await this.pool.query({
+      name: "insert_fill",
+      text: `
       INSERT INTO fills (order_id, symbol, side, qty, price, fill_time)
       VALUES ($1,$2,$3,$4,$5,$6)
       `,
-      [fill.orderId, fill.symbol, fill.side, fill.qty, fill.price, fill.time]
-    );
+      values: [fill.orderId, fill.symbol, fill.side, fill.qty, fill.price, fill.time]
+    });
   }
 
   async upsertPosition(position: Position): Promise<void> {
-    await this.pool.query(
-      `
+    await this.pool.query({
+      name: "upsert_position",
+      text: `
       INSERT INTO positions (symbol, qty, avg_price, updated_at)
       VALUES ($1,$2,$3,NOW())
       ON CONFLICT (symbol)
@@ -277,17 +328,49 @@ export class PostgresPersistence implements Persistence {
         avg_price = EXCLUDED.avg_price,
         updated_at = EXCLUDED.updated_at
       `,
-      [position.symbol, position.qty, position.avgPrice]
-    );
+      values: [position.symbol, position.qty, position.avgPrice]
+    });
+  }
+
+  async upsertPositions(positions: Position[]): Promise<void> {
+    if (positions.length === 0) {
+      return;
+    }
+    await this.pool.query({
+      name: "upsert_positions",
+      text: `
+      INSERT INTO positions (symbol, qty, avg_price, updated_at)
+      SELECT symbol, qty, avg_price, NOW()
+      FROM unnest($1::text[], $2::integer[], $3::float8[]) AS t(symbol, qty, avg_price)
+      ON CONFLICT (symbol)
+      DO UPDATE SET
+        qty = EXCLUDED.qty,
+        avg_price = EXCLUDED.avg_price,
+        updated_at = EXCLUDED.updated_at
+      `,
+      values: [
+        positions.map((p) => p.symbol),
+        positions.map((p) => p.qty),
+        positions.map((p) => p.avgPrice)
+      ]
+    });
   }
 
   async deletePosition(symbol: string): Promise<void> {
     await this.pool.query(`DELETE FROM positions WHERE symbol = $1`, [symbol]);
   }
 
+  async deletePositions(symbols: string[]): Promise<void> {
+    if (symbols.length === 0) {
+      return;
+    }
+    await this.pool.query(`DELETE FROM positions WHERE symbol = ANY($1::text[])`, [symbols]);
+  }
+
   async upsertManagedPosition(position: ManagedPositionRecord): Promise<void> {
-    await this.pool.query(
-      `
+    await this.pool.query({
+      name: "upsert_managed_position",
+      text: `
       INSERT INTO managed_positions (symbol, qty, atr14, stop_price, highest_price, updated_at)
       VALUES ($1,$2,$3,$4,$5,NOW())
       ON CONFLICT (symbol)
@@ -298,20 +381,60 @@ export class PostgresPersistence implements Persistence {
         highest_price = EXCLUDED.highest_price,
         updated_at = EXCLUDED.updated_at
       `,
-      [
+      values: [
         position.symbol,
         position.qty,
         position.atr14,
         position.stopPrice,
         position.highestPrice
       ]
-    );
+    });
+  }
+
+  async upsertManagedPositions(positions: ManagedPositionRecord[]): Promise<void> {
+    if (positions.length === 0) {
+      return;
+    }
+    // One statement for the whole batch: columns travel as arrays and are
+    // zipped back into rows by unnest.
+    await this.pool.query({
+      name: "upsert_managed_positions",
+      text: `
+      INSERT INTO managed_positions (symbol, qty, atr14, stop_price, highest_price, updated_at)
+      SELECT symbol, qty, atr14, stop_price, highest_price, NOW()
+      FROM unnest($1::text[], $2::integer[], $3::float8[], $4::float8[], $5::float8[])
+        AS t(symbol, qty, atr14, stop_price, highest_price)
+      ON CONFLICT (symbol)
+      DO UPDATE SET
+        qty = EXCLUDED.qty,
+        atr14 = EXCLUDED.atr14,
+        stop_price = EXCLUDED.stop_price,
+        highest_price = EXCLUDED.highest_price,
+        updated_at = EXCLUDED.updated_at
+      `,
+      values: [
+        positions.map((p) => p.symbol),
+        positions.map((p) => p.qty),
+        positions.map((p) => p.atr14),
+        positions.map((p) => p.stopPrice),
+        positions.map((p) => p.highestPrice)
+      ]
+    });
   }
 
   async deleteManagedPosition(symbol: string): Promise<void> {
     await this.pool.query(`DELETE FROM managed_positions WHERE symbol = $1`, [symbol]);
   }
 
+  async deleteManagedPositions(symbols: string[]): Promise<void> {
+    if (symbols.length === 0) {
+      return;
+    }
+    await this.pool.query(`DELETE FROM managed_positions WHERE symbol = ANY($1::text[])`, [
+      symbols
+    ]);
+  }
+
   async loadPositions(): Promise<Position[]> {
     const { rows } = await this.pool.query(
       `SELECT symbol, qty, avg_price FROM positions ORDER BY symbol`
@@ -336,6 +459,51 @@ export class PostgresPersistence implements Persistence {
     }));
   }
 
+  // Startup load of both tables in one round-trip. The full join keeps
+  // positions without a managed row and managed rows whose position is gone.
+  async loadPositionsWithManaged(): Promise<{
+    positions: Position[];
+    managed: ManagedPositionRecord[];
+  }> {
+    const { rows } = await this.pool.query(
+      `
+      SELECT
+        p.symbol AS position_symbol,
+        p.qty AS position_qty,
+        p.avg_price,
+        m.symbol AS managed_symbol,
+        m.qty AS managed_qty,
+        m.atr14,
+        m.stop_price,
+        m.highest_price
+      FROM positions p
+      FULL OUTER JOIN managed_positions m ON m.symbol = p.symbol
+      ORDER BY COALESCE(p.symbol, m.symbol)
+      `
+    );
+    const positions: Position[] = [];
+    const managed: ManagedPositionRecord[] = [];
+    for (const row of rows) {
+      if (row.position_symbol !== null) {
+        positions.push({
+          symbol: row.position_symbol,
+          qty: Number(row.position_qty),
+          avgPrice: Number(row.avg_price)
+        });
+      }
+      if (row.managed_symbol !== null) {
+        managed.push({
+          symbol: row.managed_symbol,
+          qty: Number(row.managed_qty),
+          atr14: Number(row.atr14),
+          stopPrice: Number(row.stop_price),
+          highestPrice: Number(row.highest_price)
+        });
+      }
+    }
+    return { positions, managed };
+  }
+
   async recordTradeEntryLot(
     symbol: string,
     qty: number,
@@ -485,15 +653,16 @@ export class PostgresPersistence implements Persistence {
   }
 
   async upsertSystemState(key: string, value: string): Promise<void> {
-    await this.pool.query(
-      `
+    await this.pool.query({
+      name: "upsert_system_state",
+      text: `
       INSERT INTO system_state (key, value, updated_at)
       VALUES ($1,$2,NOW())
       ON CONFLICT (key)
       DO UPDATE SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at
       `,
-      [key, value]
-    );
+      values: [key, value]
+    });
   }
 
   async loadSystemState(key: string): Promise<string | null> {
@@ -789,6 +958,60 @@ export class PostgresPersistence implements Persistence {
     );
   }
 
+  // A sweep writes every candidate at once; one unnest statement carries the
+  // whole batch with a fixed 14 parameters however many rows there are.
+  async insertStrategyLabCandidates(
+    candidates: Array<Omit<StrategyLabCandidateRecord, "id" | "createdAt">>
+  ): Promise<void> {
+    if (candidates.length === 0) {
+      return;
+    }
+    await this.pool.query(
+      `
+      INSERT INTO strategy_lab_candidates (
+        run_id, candidate_id, params_json, trades, win_rate, avg_r, expectancy,
+        max_drawdown_pct, cagr_pct, sharpe_proxy, stability_score, robustness_score,
+        guardrail_pass, guardrail_reasons_json
+      )
+      SELECT * FROM unnest(
+        $1::text[], $2::text[], $3::text[], $4::integer[], $5::float8[], $6::float8[],
+        $7::float8[], $8::float8[], $9::float8[], $10::float8[], $11::float8[], $12::float8[],
+        $13::boolean[], $14::text[]
+      )
+      ON CONFLICT (run_id, candidate_id)
+      DO UPDATE SET
+        params_json = EXCLUDED.params_json,
+        trades = EXCLUDED.trades,
+        win_rate = EXCLUDED.win_rate,
+        avg_r = EXCLUDED.avg_r,
+        expectancy = EXCLUDED.expectancy,
+        max_drawdown_pct = EXCLUDED.max_drawdown_pct,
+        cagr_pct = EXCLUDED.cagr_pct,
+        sharpe_proxy = EXCLUDED.sharpe_proxy,
+        stability_score = EXCLUDED.stability_score,
+        robustness_score = EXCLUDED.robustness_score,
+        guardrail_pass = EXCLUDED.guardrail_pass,
+        guardrail_reasons_json = EXCLUDED.guardrail_reasons_json
+      `,
+      [
+        candidates.map((c) => c.runId),
+        candidates.map((c) => c.candidateId),
+        candidates.map((c) => c.paramsJson),
+        candidates.map((c) => c.trades),
+        candidates.map((c) => c.winRate),
+        candidates.map((c) => c.avgR),
+        candidates.map((c) => c.expectancy),
+        candidates.map((c) => c.maxDrawdownPct),
+        candidates.map((c) => c.cagrPct),
+        candidates.map((c) => c.sharpeProxy),
+        candidates.map((c) => c.stabilityScore),
+        candidates.map((c) => c.robustnessScore),
+        candidates.map((c) => c.guardrailPass),
+        candidates.map((c) => c.guardrailReasonsJson ?? null)
+      ]
+    );
+  }
+
   async upsertStrategyLabRecommendation(
     rec: Omit<StrategyLabRecommendationRecord, "id" | "createdAt">
   ): Promise<void> {
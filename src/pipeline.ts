@@ -5,14 +5,16 @@ import { RiskEngine } from "./risk/risk_engine.js";
 import { OMS } from "./oms/oms.js";
 import { ZerodhaAdapter } from "./execution/zerodha_adapter.js";
 import { PortfolioService } from "./portfolio/portfolio.js";
-import { OrderIntent, RiskLimits, Signal } from "./types.js";
+import { OrderIntent, Signal } from "./types.js";
 import { MapLtpProvider } from "./market_data/ltp_provider.js";
 import { KiteLtpProvider } from "./market_data/kite_ltp_provider.js";
-import { KiteHistoricalProvider } from "./market_data/kite_historical_provider.js";
+import { getSharedKiteTicker } from "./market_data/kite_ticker_ltp_provider.js";
+import { getSharedHistoricalProvider } from "./market_data/kite_historical_provider.js";
 import { PositionMonitor } from "./monitor/position_monitor.js";
-import { GttProtectionRecord, NoopPersistence } from "./persistence/persistence.js";
-import { PostgresPersistence } from "./persistence/postgres_persistence.js";
+import { GttProtectionRecord, NoopPersistence, Persistence } from "./persistence/persistence.js";
+import { getPostgresPool, PostgresPersistence } from "./persistence/postgres_persistence.js";
 import { buildAlerter } from "./ops/alerter.js";
+import { getRuntimeConfig } from "./config/runtime_config.js";
 import dotenv from "dotenv";
 
 export async function runDailyPipeline() {
@@ -42,6 +44,13 @@ export async function previewMorningOrders(symbols?: string[]) {
   const eligibleCandidates = filterSet ? candidates.filter((x) => filterSet.has(x.symbol)) : candidates;
   const signals = signalBuilder.buildSignals(eligibleCandidates, store.equity);
   const rows = await evaluateSignalsForPreview(signals, store, risk, persistence);
+  // Status is either "eligible" or "skip", so one count gives both totals.
+  let eligible = 0;
+  for (const row of rows) {
+    if (row.status === "eligible") {
+      eligible += 1;
+    }
+  }
   return {
     generatedAt: new Date().toISOString(),
     liveMode: runtime.exec.isLiveMode(),
@@ -52,8 +61,8 @@ export async function previewMorningOrders(symbols?: string[]) {
     },
     summary: {
       totalSignals: rows.length,
-      eligible: rows.filter((x) => x.status === "eligible").length,
-      skipped: rows.filter((x) => x.status === "skip").length
+      eligible,
+      skipped: rows.length - eligible
     },
     rows
   };
@@ -230,14 +239,15 @@ export async function runManualPositionExit(
   const percent = Math.max(1, Math.min(100, Number(percentRaw)));
   const qty = Math.max(1, Math.floor((position.qty * percent) / 100));
   const closeQty = Math.min(position.qty, qty);
+  const now = new Date();
   const intent: OrderIntent = {
-    idempotencyKey: `MANUAL-EXIT-${symbol}-${Date.now()}`,
+    idempotencyKey: `MANUAL-EXIT-${symbol}-${now.getTime()}`,
     symbol,
     side: "SELL",
     qty: closeQty,
     type: "MARKET",
     timeInForce: "DAY",
-    createdAt: new Date().toISOString(),
+    createdAt: now.toISOString(),
     signalReason: reason
   };
   const order = await runtime.oms.createOrder(intent);
@@ -358,14 +368,15 @@ async function placeSignals(
       continue;
     }
 
+    const createdAt = new Date().toISOString();
     const intent: OrderIntent = {
-      idempotencyKey: `SIG-${signal.symbol}-${new Date().toISOString().slice(0, 10)}`,
+      idempotencyKey: `SIG-${signal.symbol}-${createdAt.slice(0, 10)}`,
       symbol: signal.symbol,
       side: signal.side,
       qty: signal.qty,
       type: "MARKET",
       timeInForce: "DAY",
-      createdAt: new Date().toISOString(),
+      createdAt,
       signalReason: signal.reason
     };
 
@@ -527,14 +538,15 @@ async function unwindPositionImmediately(
   qty: number,
   reason: string
 ) {
+  const now = new Date();
   const intent: OrderIntent = {
-    idempotencyKey: `UNWIND-${symbol}-${Date.now()}`,
+    idempotencyKey: `UNWIND-${symbol}-${now.getTime()}`,
     symbol,
     side: "SELL",
     qty,
     type: "MARKET",
     timeInForce: "DAY",
-    createdAt: new Date().toISOString(),
+    createdAt: now.toISOString(),
     signalReason: reason
   };
   const order = await runtime.oms.createOrder(intent);
@@ -621,32 +633,15 @@ async function runMonitorCycles(positionMonitor: PositionMonitor) {
 }
 
 async function createRuntime() {
+  const config = getRuntimeConfig();
   const store = new InMemoryStore();
-  store.equity = Number(process.env.STARTING_EQUITY ?? "1000000");
+  store.equity = config.startingEquity;
   const persistence = await buildPersistence();
-  for (const position of await persistence.loadPositions()) {
-    store.positions.set(position.symbol, position);
-  }
-
-  const riskLimits: RiskLimits = {
-    maxDailyLoss: Number(process.env.MAX_DAILY_LOSS ?? "50000"),
-    maxOpenPositions: Number(process.env.MAX_OPEN_POSITIONS ?? "5"),
-    maxOrdersPerDay: Number(process.env.MAX_ORDERS_PER_DAY ?? "10"),
-    maxExposurePerSymbol: Number(process.env.MAX_EXPOSURE_PER_SYMBOL ?? "300000"),
-    riskPerTrade: Number(process.env.RISK_PER_TRADE ?? "0.015")
-  };
+  const { positions, managed } = await persistence.loadPositionsWithManaged();
+  store.positions = new Map(positions.map((position) => [position.symbol, position]));
 
-  const signalBuilder = new SignalBuilder({
-    minRsi: Number(process.env.STRATEGY_MIN_RSI ?? "55"),
-    breakoutBufferPct: Number(process.env.STRATEGY_BREAKOUT_BUFFER_PCT ?? "0.02"),
-    atrStopMultiple: Number(process.env.ATR_STOP_MULTIPLE ?? "2"),
-    riskPerTrade: riskLimits.riskPerTrade,
-    minCapitalDeployPct: Number(process.env.MIN_CAPITAL_DEPLOY_PCT ?? "0"),
-    minAdv20: Number(process.env.STRATEGY_MIN_ADV20 ?? "100000000"),
-    minVolumeRatio: Number(process.env.STRATEGY_MIN_VOLUME_RATIO ?? "1.2"),
-    maxSignals: Number(process.env.STRATEGY_MAX_SIGNALS ?? "5")
-  });
-  const risk = new RiskEngine(store, riskLimits);
+  const signalBuilder = new SignalBuilder(config.signal);
+  const risk = new RiskEngine(store, config.riskLimits);
   const oms = new OMS(store, persistence);
   const screener = new ScreenerService(buildHistoricalProvider());
   const ltpProvider = buildLtpProvider(store);
@@ -664,10 +659,10 @@ async function createRuntime() {
     oms,
     exec,
     portfolio,
-    Number(process.env.ATR_TRAILING_MULTIPLE ?? "2"),
+    config.trailingAtrMultiple,
     persistence
   );
-  await positionMonitor.hydrate();
+  await positionMonitor.hydrate(managed);
   const alerter = buildAlerter(persistence);
 
   const fundUsagePct = clamp01(Number(process.env.FUND_USAGE_PCT ?? "0.95"));
@@ -724,7 +719,11 @@ function buildLtpProvider(store: InMemoryStore) {
   const apiKey = process.env.KITE_API_KEY;
   const accessToken = process.env.KITE_ACCESS_TOKEN;
   if (apiKey && accessToken) {
-    return new KiteLtpProvider({ apiKey, accessToken });
+    const http = new KiteLtpProvider({ apiKey, accessToken });
+    if (process.env.KITE_TICKER_ENABLED === "1") {
+      return getSharedKiteTicker({ apiKey, accessToken, fallback: http }) ?? http;
+    }
+    return http;
   }
   const ltpMap = new Map(
     Array.from(store.positions.values()).map((position) => [position.symbol, position.avgPrice])
@@ -742,18 +741,32 @@ function buildHistoricalProvider() {
   if (!apiKey || !accessToken) {
     throw new Error("KITE_API_KEY and KITE_ACCESS_TOKEN are required for screener");
   }
-  return new KiteHistoricalProvider({ apiKey, accessToken });
+  return getSharedHistoricalProvider(apiKey, accessToken);
 }
 
+// Initialized Postgres persistence per DATABASE_URL. It holds no state of
+// its own beyond the shared pool, so every runtime in the process reuses it
+// while that pool is open; a failed init is not cached and is retried.
+const persistenceByUrl = new Map<
+  string,
+  { pool: ReturnType<typeof getPostgresPool>; persistence: PostgresPersistence }
+>();
+
 async function buildPersistence() {
   const databaseUrl = process.env.DATABASE_URL;
   if (!databaseUrl) {
     return new NoopPersistence();
   }
+  const pool = getPostgresPool(databaseUrl);
+  const ready = persistenceByUrl.get(databaseUrl);
+  if (ready && ready.pool === pool) {
+    return ready.persistence;
+  }
   const requireDb = process.env.REQUIRE_DB === "1";
   const pg = new PostgresPersistence(databaseUrl);
   try {
     await pg.init();
+    persistenceByUrl.set(databaseUrl, { pool, persistence: pg });
     return pg;
   } catch (err) {
     if (requireDb) {
@@ -910,14 +923,15 @@ async function closeAllPositions(runtime: Awaited<ReturnType<typeof createRuntim
     if (position.qty <= 0) {
       continue;
     }
+    const createdAt = new Date().toISOString();
     const intent: OrderIntent = {
-      idempotencyKey: `EOD-${position.symbol}-${new Date().toISOString().slice(0, 10)}`,
+      idempotencyKey: `EOD-${position.symbol}-${createdAt.slice(0, 10)}`,
       symbol: position.symbol,
       side: "SELL",
       qty: position.qty,
       type: "MARKET",
       timeInForce: "DAY",
-      createdAt: new Date().toISOString(),
+      createdAt,
       signalReason: "EOD square-off"
     };
     const order = await oms.createOrder(intent);
@@ -1052,39 +1066,61 @@ function buildOpsExecutionAdapter() {
   });
 }
 
+// Last daily snapshot row written through each persistence, serialized.
+// Persistence objects are memoized per database, so every in-process writer
+// of a database shares one key. Writes from other processes are not seen: a
+// row they overwrite is only restored once this process's row changes again.
+const lastSnapshotKeys = new WeakMap<Persistence, string>();
+
 async function persistDailySnapshot(
   runtime: Awaited<ReturnType<typeof createRuntime>>,
   note: string
 ) {
   const { store, exec, persistence } = runtime;
   let unrealized = 0;
-  for (const position of Array.from(store.positions.values())) {
-    try {
-      const ltp = await exec.getLtp(position.symbol);
+  const positions = Array.from(store.positions.values());
+  let ltps = new Map<string, number>();
+  try {
+    ltps = await exec.getLtps(positions.map((position) => position.symbol));
+  } catch {
+    // If the LTP fetch fails, keep unrealized as 0 for now.
+  }
+  for (const position of positions) {
+    const ltp = ltps.get(position.symbol);
+    // Symbols without a quote keep unrealized at 0 for now.
+    if (ltp !== undefined) {
       unrealized += (ltp - position.avgPrice) * position.qty;
-    } catch {
-      // If LTP fetch fails, keep unrealized for this symbol as 0 for now.
     }
   }
   const snapshot = store.getSnapshot();
-  await persistence.upsertDailySnapshot({
+  const row = {
     tradeDate: getTradeDateIST(),
     equity: snapshot.equity,
     realizedPnl: snapshot.realizedPnl,
     unrealizedPnl: unrealized,
     openPositions: snapshot.positions.length,
-    note,
-    createdAt: new Date().toISOString()
-  });
+    note
+  };
+  // Repeated passes (the live loop's monitor runs) often produce the same
+  // row; skip the upsert when it matches the last one this process wrote.
+  const key = JSON.stringify(row);
+  if (lastSnapshotKeys.get(persistence) === key) {
+    return;
+  }
+  await persistence.upsertDailySnapshot({ ...row, createdAt: new Date().toISOString() });
+  lastSnapshotKeys.set(persistence, key);
 }
 
+// Building an Intl formatter loads timezone data, so build it once.
+const IST_DATE_FORMAT = new Intl.DateTimeFormat("en-CA", {
+  timeZone: "Asia/Kolkata",
+  year: "numeric",
+  month: "2-digit",
+  day: "2-digit"
+});
+
 function getTradeDateIST(): string {
-  const parts = new Intl.DateTimeFormat("en-CA", {
-    timeZone: "Asia/Kolkata",
-    year: "numeric",
-    month: "2-digit",
-    day: "2-digit"
-  }).formatToParts(new Date());
+  const parts = IST_DATE_FORMAT.formatToParts(new Date());
   const year = parts.find((p) => p.type === "year")?.value ?? "1970";
   const month = parts.find((p) => p.type === "month")?.value ?? "01";
   const day = parts.find((p) => p.type === "day")?.value ?? "01";
@@ -1,7 +1,8 @@
 import { KiteHistoricalProvider } from "../market_data/kite_historical_provider.js";
-import { ScreenerResult } from "../types.js";
-import { atr, ema, pctChange, rsi, sma } from "../utils/indicators.js";
+import { BarSeries, ScreenerResult } from "../types.js";
+import { indicatorSnapshot, pctChange, trailingMeanProduct } from "../utils/indicators.js";
 import { asyncPool } from "../utils/async_pool.js";
+import { topK } from "../utils/top_k.js";
 
 export class ScreenerService {
   constructor(private historicalProvider?: KiteHistoricalProvider) {}
@@ -12,114 +13,62 @@ export class ScreenerService {
     }
     const provider = this.historicalProvider;
 
-    const instruments = await provider.getInstruments("NSE");
-    const { from, to } = lookbackWindow(160);
-    const symbols = await this.getTopLiquidUniverse(instruments);
-    const benchmark = await this.loadNiftyReturn(instruments);
-    const concurrency = Number(process.env.SCREENER_CONCURRENCY ?? "6");
-
-    const computed = await asyncPool(symbols, concurrency, async (symbol) => {
-      const instrument = instruments.get(symbol);
-      if (!instrument) {
-        console.warn(`Skipping ${symbol}: instrument not found`);
-        return null;
-      }
-
-      const bars = await provider.getHistoricalDayBars(
-        instrument.instrumentToken,
-        from,
-        to
-      );
-
-      if (bars.length < 80) {
-        console.warn(`Skipping ${symbol}: insufficient candles (${bars.length})`);
-        return null;
+    const [instruments, equities] = await Promise.all([
+      provider.getInstruments("NSE"),
+      provider.getEquities("NSE")
+    ]);
+    const [universe, benchmark] = await Promise.all([
+      this.loadLiquidUniverse(equities),
+      this.loadNiftyReturn(instruments)
+    ]);
+
+    const results: ScreenerResult[] = [];
+    for (const { symbol, bars } of universe) {
+      const result = screenBars(symbol, bars, benchmark);
+      if (result) {
+        results.push(result);
       }
-
-      const closes = bars.map((b) => b.close);
-      const volumes = bars.map((b) => b.volume);
-      const highs = bars.map((b) => b.high);
-      const lows = bars.map((b) => b.low);
-
-      const close = last(closes);
-      const ema20 = ema(closes, 20);
-      const ema50 = ema(closes, 50);
-      const rsi14 = rsi(closes, 14);
-      const atr14 = atr(highs, lows, closes, 14);
-      const high20 = Math.max(...highs.slice(-20));
-      const adv20 = averageTradedValue(closes.slice(-20), volumes.slice(-20));
-      const volumeRatio = sma(volumes.slice(-20)) / sma(volumes.slice(-50));
-      const stockRet60 = pctChange(closes[closes.length - 61], close);
-      const rsScore60d = stockRet60 - benchmark;
-
-      return {
-        symbol,
-        close,
-        ema20,
-        ema50,
-        rsi14,
-        atr14,
-        rsScore60d,
-        adv20,
-        volumeRatio,
-        high20
-      };
-    });
-
-    const results = computed.filter((r): r is ScreenerResult => r !== null);
+    }
 
     return results.sort((a, b) => b.rsScore60d - a.rsScore60d);
   }
 
-  private async getTopLiquidUniverse(
-    instruments: Map<
-      string,
-      {
-        instrumentToken: string;
-        tradingsymbol: string;
-        exchange: string;
-        segment: string;
-        instrumentType: string;
-      }
-    >
-  ): Promise<string[]> {
+  // Ranks the seed list by 20-day traded value and keeps the top
+  // SCREENER_MAX_SYMBOLS. The full indicator lookback is fetched here, so
+  // the kept symbols are screened from these bars without a second fetch.
+  private async loadLiquidUniverse(
+    equities: Map<string, { instrumentToken: string }>
+  ): Promise<Array<{ symbol: string; bars: BarSeries }>> {
     const maxSymbols = Number(process.env.SCREENER_MAX_SYMBOLS ?? "30");
     const minPrice = Number(process.env.SCREENER_MIN_PRICE ?? "50");
     const maxPrice = Number(process.env.SCREENER_MAX_PRICE ?? "10000");
 
-    const seeds = LIQUID_SYMBOL_SEED.filter((symbol) => {
-      const inst = instruments.get(symbol);
-      return inst && inst.exchange === "NSE" && inst.segment === "NSE" && inst.instrumentType === "EQ";
-    });
-    const { from, to } = lookbackWindow(45);
+    const seeds = LIQUID_SYMBOL_SEED.filter((symbol) => equities.has(symbol));
+    const { from, to } = lookbackWindow(160);
 
     const concurrency = Number(process.env.SCREENER_CONCURRENCY ?? "6");
     const ranked = await asyncPool(seeds, concurrency, async (symbol) => {
-      const inst = instruments.get(symbol);
+      const inst = equities.get(symbol);
       if (!inst) {
         return null;
       }
-      const bars = await this.historicalProvider!.getHistoricalDayBars(
+      const bars = await this.historicalProvider!.getHistoricalDaySeries(
         inst.instrumentToken,
         from,
         to
       );
-      if (bars.length < 20) {
+      if (bars.close.length < 20) {
         return null;
       }
-      const closes = bars.map((b) => b.close);
-      const volumes = bars.map((b) => b.volume);
-      const adv20 = averageTradedValue(closes.slice(-20), volumes.slice(-20));
-      const lastPrice = closes[closes.length - 1];
-      return { symbol, tradedValue: adv20, lastPrice };
+      const tradedValue = trailingMeanProduct(bars.close, bars.volume, 20);
+      const lastPrice = last(bars.close);
+      return { symbol, bars, tradedValue, lastPrice };
     });
 
-    return ranked
-      .filter((item): item is { symbol: string; tradedValue: number; lastPrice: number } => item !== null)
-      .filter((item) => item.lastPrice >= minPrice && item.lastPrice <= maxPrice)
-      .sort((a, b) => b.tradedValue - a.tradedValue)
-      .slice(0, maxSymbols)
-      .map((r) => r.symbol);
+    const eligible = ranked
+      .filter((item): item is NonNullable<typeof item> => item !== null)
+      .filter((item) => item.lastPrice >= minPrice && item.lastPrice <= maxPrice);
+    return topK(eligible, maxSymbols, (item) => item.tradedValue);
   }
 
   private async loadNiftyReturn(
@@ -131,18 +80,18 @@ export class ScreenerService {
     }
 
     const { from, to } = lookbackWindow(90);
-    const bars = await this.historicalProvider!.getHistoricalDayBars(
+    // Only two closes are read, so take them from the close column directly.
+    const { close } = await this.historicalProvider!.getHistoricalDaySeries(
       nifty.instrumentToken,
       from,
       to
     );
 
-    if (bars.length < 61) {
+    if (close.length < 61) {
       return 0;
     }
 
-    const closes = bars.map((b) => b.close);
-    return pctChange(closes[closes.length - 61], closes[closes.length - 1]);
+    return pctChange(close[close.length - 61], close[close.length - 1]);
   }
 }
 
@@ -163,12 +112,36 @@ function formatDate(date: Date): string {
   return `${yyyy}-${mm}-${dd}`;
 }
 
-function averageTradedValue(closes: number[], volumes: number[]): number {
-  const values = closes.map((close, i) => close * volumes[i]);
-  return sma(values);
+function screenBars(symbol: string, bars: BarSeries, benchmark: number): ScreenerResult | null {
+  if (bars.close.length < 80) {
+    console.warn(`Skipping ${symbol}: insufficient candles (${bars.close.length})`);
+    return null;
+  }
+
+  // The provider's columns feed one fused indicator sweep.
+  const { close: closes, volume: volumes, high: highs, low: lows } = bars;
+  const close = last(closes);
+  const { ema20, ema50, rsi14, atr14, high20, adv20, avgVolume20, avgVolume50 } =
+    indicatorSnapshot(highs, lows, closes, volumes);
+  const volumeRatio = avgVolume20 / avgVolume50;
+  const stockRet60 = pctChange(closes[closes.length - 61], close);
+  const rsScore60d = stockRet60 - benchmark;
+
+  return {
+    symbol,
+    close,
+    ema20,
+    ema50,
+    rsi14,
+    atr14,
+    rsScore60d,
+    adv20,
+    volumeRatio,
+    high20
+  };
 }
 
-function last(values: number[]): number {
+function last(values: ArrayLike<number>): number {
   return values[values.length - 1];
 }
 
@@ -1,4 +1,5 @@
 import { ScreenerResult, Signal } from "../types.js";
+import { topK } from "../utils/top_k.js";
 
 export interface SignalBuilderConfig {
   minRsi: number;
@@ -24,9 +25,7 @@ export class SignalBuilder {
       return trendOk && nearHigh && momentumOk && liquidityOk && volumeOk;
     });
 
-    const sorted = candidates
-      .sort((a, b) => b.rsScore60d - a.rsScore60d)
-      .slice(0, this.cfg.maxSignals);
+    const sorted = topK(candidates, this.cfg.maxSignals, (r) => r.rsScore60d);
 
     return sorted
       .map((r) => {
@@ -1,4 +1,4 @@
-import { KiteHistoricalProvider } from "../market_data/kite_historical_provider.js";
+import { getSharedHistoricalProvider } from "../market_data/kite_historical_provider.js";
 import { runBacktest } from "../backtest/engine.js";
 
 export type StrategyLabParams = {
@@ -59,7 +59,7 @@ export async function runStrategyLabSweep(input?: {
   const runId = `sl-${Date.now()}`;
   const base = baseParamsFromEnv();
   const candidateParams = generateCandidates(base, input?.maxCandidates);
-  const provider = new KiteHistoricalProvider({ apiKey, accessToken });
+  const provider = getSharedHistoricalProvider(apiKey, accessToken);
   const candidates: StrategyLabCandidate[] = [];
 
   for (let i = 0; i < candidateParams.length; i += 1) {
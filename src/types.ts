@@ -84,6 +84,17 @@ export interface MarketBar {
   volume: number;
 }
 
+// Column-per-field view of a bar history (row i across all arrays is one bar).
+export interface BarSeries {
+  symbol: string;
+  time: string[];
+  open: Float64Array;
+  high: Float64Array;
+  low: Float64Array;
+  close: Float64Array;
+  volume: Float64Array;
+}
+
 export interface RiskLimits {
   maxDailyLoss: number; // INR
   maxOpenPositions: number;
@@ -4,7 +4,6 @@ import crypto from "node:crypto";
 import { existsSync } from "node:fs";
 import { readFile } from "node:fs/promises";
 import dotenv from "dotenv";
-import { Pool } from "pg";
 import {
   cancelGttProtectionForSymbol,
   getGttProtectionStatus,
@@ -18,7 +17,7 @@ import {
   runPreflightPass
 } from "../pipeline.js";
 import PDFDocument from "pdfkit";
-import { PostgresPersistence } from "../persistence/postgres_persistence.js";
+import { getPostgresPool, PostgresPersistence } from "../persistence/postgres_persistence.js";
 import { NoopPersistence } from "../persistence/persistence.js";
 import { runConfiguredBacktest } from "../backtest/service.js";
 import { runStrategyLabSweep } from "../strategy_lab/service.js";
@@ -26,9 +25,14 @@ import { TradingScheduler } from "../ops/scheduler.js";
 import { ZerodhaAdapter } from "../execution/zerodha_adapter.js";
 import { MapLtpProvider } from "../market_data/ltp_provider.js";
 import { buildAlerter } from "../ops/alerter.js";
-import { KiteHistoricalProvider } from "../market_data/kite_historical_provider.js";
-import { atr, ema, pctChange, rsi, sma } from "../utils/indicators.js";
+import {
+  getSharedHistoricalProvider,
+  KiteHistoricalProvider
+} from "../market_data/kite_historical_provider.js";
+import { indicatorSnapshot, pctChange, rsi } from "../utils/indicators.js";
 import { asyncPool } from "../utils/async_pool.js";
+import { TtlCache } from "../utils/ttl_cache.js";
+import { topK } from "../utils/top_k.js";
 import {
   applyEnvOverrides,
   applyProfile,
@@ -42,6 +46,25 @@ dotenv.config();
 const PORT = Number(process.env.UI_PORT ?? "3000");
 const REACT_DIST_DIR = path.resolve(process.cwd(), "dashboard", "dist");
 const HAS_REACT_BUILD = existsSync(path.join(REACT_DIST_DIR, "index.html"));
+
+// IST formatters are built once; getIstTradeDate runs per row when grouping
+// fills and orders by date, and each new formatter reloads timezone data.
+const IST_DATE_FORMAT = new Intl.DateTimeFormat("en-CA", {
+  timeZone: "Asia/Kolkata",
+  year: "numeric",
+  month: "2-digit",
+  day: "2-digit"
+});
+const IST_DATE_TIME_FORMAT = new Intl.DateTimeFormat("en-CA", {
+  timeZone: "Asia/Kolkata",
+  year: "numeric",
+  month: "2-digit",
+  day: "2-digit",
+  hour: "2-digit",
+  minute: "2-digit",
+  second: "2-digit",
+  hour12: false
+});
 type UiJob =
   | "morning"
   | "monitor"
@@ -133,6 +156,22 @@ let brokerOrdersCache:
       data: BrokerOrdersReport;
     }
   | null = null;
+// Screener and preview caches hold serialized bodies so hits skip JSON.stringify.
+const screenerCache = new TtlCache<string, string>(Number(process.env.SCREENER_CACHE_MS ?? "900000"));
+const morningPreviewCache = new TtlCache<string, string>(
+  Number(process.env.MORNING_PREVIEW_CACHE_MS ?? "60000")
+);
+const statusPreflightCache = new TtlCache<"lastPreflight", unknown>(
+  Number(process.env.STATUS_CACHE_MS ?? "30000"),
+  1
+);
+
+// Drop the cached preview and preflight after anything that changes the data
+// behind them: jobs, manual position edits, config/profile and funds updates.
+function invalidateUiCaches() {
+  morningPreviewCache.clear();
+  statusPreflightCache.clear();
+}
 const scheduler = new TradingScheduler(
   {
     runMorning: () => runUiJob("morning", "SCHED_MORNING", () => runMorningWorkflow()),
@@ -185,14 +224,25 @@ const server = http.createServer(async (req, res) => {
     }
 
     if (method === "GET" && url.pathname === "/api/status") {
-      const report = await getDbReport();
-      json(res, 200, {
-        runningJob,
-        liveMode: process.env.LIVE_ORDER_MODE === "1",
-        lastPreflight: report.lastPreflight ?? null,
-        safeMode: getSafeModeState(),
-        scheduler: scheduler.getState()
-      });
+      let lastPreflight = statusPreflightCache.get("lastPreflight");
+      const cacheState = lastPreflight === undefined ? "MISS" : "HIT";
+      if (lastPreflight === undefined) {
+        const report = await getDbReport();
+        lastPreflight = report.lastPreflight ?? null;
+        statusPreflightCache.set("lastPreflight", lastPreflight);
+      }
+      json(
+        res,
+        200,
+        {
+          runningJob,
+          liveMode: process.env.LIVE_ORDER_MODE === "1",
+          lastPreflight,
+          safeMode: getSafeModeState(),
+          scheduler: scheduler.getState()
+        },
+        { "X-Cache": cacheState }
+      );
       return;
     }
 
@@ -274,15 +324,33 @@ const server = http.createServer(async (req, res) => {
     }
 
     if (method === "GET" && url.pathname === "/api/screener") {
+      const cacheKey = queryCacheKey(url);
+      const cached = url.searchParams.get("refresh") === "1" ? undefined : screenerCache.get(cacheKey);
+      if (cached !== undefined) {
+        sendJson(res, 200, cached, { "X-Cache": "HIT" });
+        return;
+      }
       const screener = await runCustomScreener(url);
-      json(res, 200, screener);
+      const body = JSON.stringify(screener);
+      if (screener.enabled) {
+        screenerCache.set(cacheKey, body);
+      }
+      sendJson(res, 200, body, { "X-Cache": "MISS" });
       return;
     }
 
     if (method === "GET" && url.pathname === "/api/morning/preview") {
       const symbols = parseCsvQuery(url.searchParams.get("symbols"));
-      const preview = await previewMorningOrders(symbols);
-      json(res, 200, preview);
+      const cacheKey = [...symbols].sort().join(",");
+      const cached =
+        url.searchParams.get("refresh") === "1" ? undefined : morningPreviewCache.get(cacheKey);
+      if (cached !== undefined) {
+        sendJson(res, 200, cached, { "X-Cache": "HIT" });
+        return;
+      }
+      const body = JSON.stringify(await previewMorningOrders(symbols));
+      morningPreviewCache.set(cacheKey, body);
+      sendJson(res, 200, body, { "X-Cache": "MISS" });
       return;
     }
 
@@ -385,6 +453,7 @@ const server = http.createServer(async (req, res) => {
         return;
       }
       const applied = await applyStrategyLabCandidate(candidateId);
+      invalidateUiCaches();
       if (!applied.ok) {
         json(res, 400, applied);
         return;
@@ -402,6 +471,7 @@ const server = http.createServer(async (req, res) => {
 
     if (method === "POST" && url.pathname === "/api/funds/recompute") {
       const snapshot = await recomputeFundsSnapshot();
+      invalidateUiCaches();
       json(res, 200, { ok: true, funds: snapshot });
       return;
     }
@@ -509,6 +579,7 @@ const server = http.createServer(async (req, res) => {
         return;
       }
       const applied = await applyEnvOverrides(updates);
+      invalidateUiCaches();
       const restartRequired = Object.keys(updates).some((key) => ENV_RESTART_REQUIRED_KEYS.has(key));
       await appendAuditEvent(tenantId, "env_config_updated", {
         keys: Object.keys(updates),
@@ -693,6 +764,7 @@ const server = http.createServer(async (req, res) => {
       const applied = await applyProfile(profile);
       scheduler.stop();
       await setSafeMode(true, `Profile switched to ${profile}: ${reason}`, "profile_switch");
+      invalidateUiCaches();
       await appendAuditEvent(tenantId, "profile_switched", { profile, reason });
       await notifyOpsAlert("warning", "profile_switched", `Profile switched to ${profile}`, {
         reason,
@@ -755,6 +827,7 @@ const server = http.createServer(async (req, res) => {
         return;
       }
       const result = await runManualPositionExit(symbol, percent, reason);
+      invalidateUiCaches();
       json(res, 200, { ok: true, result });
       return;
     }
@@ -768,6 +841,7 @@ const server = http.createServer(async (req, res) => {
         return;
       }
       const result = await runManualStopUpdate(symbol, stopPrice);
+      invalidateUiCaches();
       json(res, 200, { ok: true, result });
       return;
     }
@@ -1214,9 +1288,35 @@ async function notifySafeModeChange(state: SafeModeState) {
   }
 }
 
-function json(res: http.ServerResponse, status: number, body: unknown) {
-  res.writeHead(status, { "Content-Type": "application/json; charset=utf-8" });
-  res.end(JSON.stringify(body));
+function json(
+  res: http.ServerResponse,
+  status: number,
+  body: unknown,
+  headers: Record<string, string> = {}
+) {
+  // JSON.stringify(undefined) yields undefined; keep the old empty-body behavior.
+  sendJson(res, status, JSON.stringify(body) ?? "", headers);
+}
+
+function sendJson(
+  res: http.ServerResponse,
+  status: number,
+  body: string,
+  headers: Record<string, string> = {}
+) {
+  res.writeHead(status, {
+    "Content-Type": "application/json; charset=utf-8",
+    "Content-Length": String(Buffer.byteLength(body)),
+    ...headers
+  });
+  res.end(body);
+}
+
+function queryCacheKey(url: URL) {
+  const params = new URLSearchParams(url.searchParams);
+  params.delete("refresh");
+  params.sort();
+  return params.toString();
 }
 
 function launchJob(
@@ -1270,6 +1370,7 @@ async function runUiJob(job: UiJob, logTag: string, runner: () => Promise<unknow
     throw err;
   } finally {
     runningJob = null;
+    invalidateUiCaches();
   }
 }
 
@@ -1647,7 +1748,7 @@ async function getDbReport() {
     };
   }
 
-  const pool = new Pool({ connectionString: databaseUrl });
+  const pool = getPostgresPool(databaseUrl);
   try {
     const [orders, fills, positions, managed, dailySnapshots] = await Promise.all([
       pool.query(
@@ -1851,8 +1952,6 @@ async function getDbReport() {
       latestAlerts: [],
       latestReconcile: []
     };
-  } finally {
-    await pool.end();
   }
 }
 
@@ -2004,54 +2103,61 @@ async function runCustomScreener(url: URL) {
   const sortBy = (url.searchParams.get("sortBy") ?? "rs").toLowerCase();
   const concurrency = Math.max(1, Math.min(10, Math.floor(toNumber(url.searchParams.get("concurrency"), 5))));
 
-  const provider = new KiteHistoricalProvider({
-    apiKey,
-    accessToken
-  });
-  const instruments = await provider.getInstruments("NSE");
+  const provider = getSharedHistoricalProvider(apiKey, accessToken);
+  const [instruments, equities] = await Promise.all([
+    provider.getInstruments("NSE"),
+    provider.getEquities("NSE")
+  ]);
   const allSymbols = symbolsParam.length > 0 ? symbolsParam : defaultScreenerSymbols();
-  const universe = allSymbols.filter((symbol) => {
-    const inst = instruments.get(symbol);
-    return !!inst && inst.exchange === "NSE" && inst.segment === "NSE" && inst.instrumentType === "EQ";
-  });
+  const universe = allSymbols.filter((symbol) => equities.has(symbol));
 
-  const benchmarkRet = await loadNiftyBenchmarkReturn(provider, instruments, historyFrom, rangeTo);
+  // The benchmark fetch overlaps the per-symbol fan-out; RS is adjusted once both finish.
+  const benchmarkPromise = loadNiftyBenchmarkReturn(provider, instruments, historyFrom, rangeTo);
   const rowsRaw = await asyncPool(universe, concurrency, async (symbol) => {
-    const inst = instruments.get(symbol);
+    const inst = equities.get(symbol);
     if (!inst) {
       return null;
     }
     try {
-      const bars = await provider.getHistoricalDayBars(inst.instrumentToken, historyFrom, rangeTo);
-      const normalized = bars
-        .filter((b) => Number.isFinite(b.close) && Number.isFinite(b.volume))
-        .sort((a, b) => a.time.localeCompare(b.time));
-      const inRange = normalized.filter((b) => {
-        const day = b.time.slice(0, 10);
-        return day >= rangeFrom && day <= rangeTo;
-      });
-      if (inRange.length === 0 || normalized.length < 80) {
+      // Provider series are already ascending with non-finite rows dropped.
+      const bars = await provider.getHistoricalDaySeries(inst.instrumentToken, historyFrom, rangeTo);
+      // The latest in-range bar is the last one dated on or before rangeTo,
+      // which for an ascending series is found by stepping back from the end
+      // (normally zero steps, since the fetch already stops at rangeTo).
+      const { time } = bars;
+      let latestIdx = time.length - 1;
+      while (latestIdx >= 0 && time[latestIdx].slice(0, 10) > rangeTo) {
+        latestIdx -= 1;
+      }
+      if (latestIdx < 0 || time[latestIdx].slice(0, 10) < rangeFrom || time.length < 80) {
         return null;
       }
-      const latest = inRange[inRange.length - 1];
-      const latestIdx = normalized.findIndex((x) => x.time === latest.time);
+      const latestTime = time[latestIdx];
       if (latestIdx < 61) {
         return null;
       }
-      const slice = normalized.slice(0, latestIdx + 1);
-      const closes = slice.map((b) => b.close);
-      const highs = slice.map((b) => b.high);
-      const lows = slice.map((b) => b.low);
-      const volumes = slice.map((b) => b.volume);
-      const close = closes[closes.length - 1];
-      const ema20Value = ema(closes, 20);
-      const ema50Value = ema(closes, 50);
-      const rsi14Value = rsi(closes, 14);
-      const atr14Value = atr(highs, lows, closes, 14);
-      const high20 = Math.max(...highs.slice(-20));
-      const volumeRatio = sma(volumes.slice(-20)) / Math.max(1, sma(volumes.slice(-50)));
-      const adv20 = sma(closes.slice(-20).map((x, i) => x * volumes.slice(-20)[i]));
-      const rsScore60d = pctChange(closes[closes.length - 61], close) - benchmarkRet;
+      // Zero-copy views of the columns up to the latest in-range day.
+      const n = latestIdx + 1;
+      const closes = bars.close.subarray(0, n);
+      const highs = bars.high.subarray(0, n);
+      const lows = bars.low.subarray(0, n);
+      const volumes = bars.volume.subarray(0, n);
+      const close = closes[n - 1];
+      // Reject on the cheapest criteria first: price needs no indicators and
+      // RSI only the close column, so most symbols never reach the full
+      // snapshot. Rows that survive still carry every field.
+      if (!(close >= minPrice && close <= maxPrice)) {
+        return null;
+      }
+      const rsi14 = rsi(closes, 14);
+      if (!(rsi14 >= rsiMin && rsi14 <= rsiMax)) {
+        return null;
+      }
+      const snapshot = indicatorSnapshot(highs, lows, closes, volumes);
+      const ema20Value = snapshot.ema20;
+      const ema50Value = snapshot.ema50;
+      const volumeRatio = snapshot.avgVolume20 / Math.max(1, snapshot.avgVolume50);
+      const stockRet60 = pctChange(closes[closes.length - 61], close);
       const trendLabel: "up" | "down" | "flat" =
         close > ema20Value && ema20Value > ema50Value
           ? "up"
@@ -2061,16 +2167,16 @@ async function runCustomScreener(url: URL) {
 
       return {
         symbol,
-        asOf: latest.time.slice(0, 10),
+        asOf: latestTime.slice(0, 10),
         close,
         ema20: ema20Value,
         ema50: ema50Value,
-        rsi14: rsi14Value,
-        atr14: atr14Value,
-        high20,
+        rsi14,
+        atr14: snapshot.atr14,
+        high20: snapshot.high20,
         volumeRatio,
-        adv20,
-        rsScore60d,
+        adv20: snapshot.adv20,
+        rsScore60d: stockRet60,
         trend: trendLabel
       } satisfies ScreenerRow;
     } catch {
@@ -2078,28 +2184,34 @@ async function runCustomScreener(url: URL) {
     }
   });
 
-  const filtered = rowsRaw
-    .filter((row): row is ScreenerRow => row !== null)
-    .filter((row) => row.close >= minPrice && row.close <= maxPrice)
-    .filter((row) => row.rsi14 >= rsiMin && row.rsi14 <= rsiMax)
-    .filter((row) => row.volumeRatio >= minVolumeRatio)
-    .filter((row) => row.adv20 >= minAdv20)
-    .filter((row) => row.rsScore60d >= minRsScore)
-    .filter((row) => (trend === "up" ? row.trend === "up" : trend === "down" ? row.trend === "down" : true))
-    .filter((row) => (breakoutOnly ? row.close >= row.high20 * 0.995 : true));
-
-  const sorted = filtered.sort((a, b) => {
-    if (sortBy === "rsi") {
-      return b.rsi14 - a.rsi14;
-    }
-    if (sortBy === "volume") {
-      return b.volumeRatio - a.volumeRatio;
-    }
-    if (sortBy === "price") {
-      return b.close - a.close;
-    }
-    return b.rsScore60d - a.rsScore60d;
-  });
+  const benchmarkRet = await benchmarkPromise;
+  const rows = rowsRaw.filter((row): row is ScreenerRow => row !== null);
+  for (const row of rows) {
+    row.rsScore60d -= benchmarkRet;
+  }
+
+  // One pass with a single predicate; the trend and breakout choices are
+  // resolved once per request instead of per row. Price and RSI bounds were
+  // already applied during the fan-out.
+  const trendFilter = trend === "up" || trend === "down" ? trend : null;
+  const passes = (row: ScreenerRow) =>
+    row.volumeRatio >= minVolumeRatio &&
+    row.adv20 >= minAdv20 &&
+    row.rsScore60d >= minRsScore &&
+    (trendFilter === null || row.trend === trendFilter) &&
+    (!breakoutOnly || row.close >= row.high20 * 0.995);
+  const filtered = rows.filter(passes);
+
+  // Pick the sort key once rather than branching on sortBy per comparison.
+  const sortKey: (row: ScreenerRow) => number =
+    sortBy === "rsi"
+      ? (row) => row.rsi14
+      : sortBy === "volume"
+        ? (row) => row.volumeRatio
+        : sortBy === "price"
+          ? (row) => row.close
+          : (row) => row.rsScore60d;
+  const top = topK(filtered, maxResults, sortKey);
 
   return {
     enabled: true,
@@ -2122,7 +2234,7 @@ async function runCustomScreener(url: URL) {
       requested: allSymbols.length,
       eligible: universe.length
     },
-    rows: sorted.slice(0, maxResults)
+    rows: top
   };
 }
 
@@ -2141,8 +2253,8 @@ async function runStrategyLabAndPersist() {
       datasetWindow: output.datasetWindow,
       notesJson: JSON.stringify({ candidateCount: output.candidates.length })
     });
-    for (const candidate of output.candidates) {
-      await persistence.insertStrategyLabCandidate({
+    await persistence.insertStrategyLabCandidates(
+      output.candidates.map((candidate) => ({
         runId: output.runId,
         candidateId: candidate.candidateId,
         paramsJson: JSON.stringify(candidate.params),
@@ -2157,8 +2269,8 @@ async function runStrategyLabAndPersist() {
         robustnessScore: candidate.robustnessScore,
         guardrailPass: candidate.guardrailPass,
         guardrailReasonsJson: JSON.stringify(candidate.guardrailReasons)
-      });
-    }
+      }))
+    );
     await persistence.upsertStrategyLabRecommendation({
       runId: output.runId,
       candidateId: output.recommendation.candidateId,
@@ -2606,7 +2718,7 @@ async function getHealthReport() {
 
   let latestAlertErrors: Array<{ time: string; type: string; message: string }> = [];
   if (databaseUrl) {
-    const pool = new Pool({ connectionString: databaseUrl });
+    const pool = getPostgresPool(databaseUrl);
     try {
       const alertTable = await pool.query<{ exists: string | null }>(
         `SELECT to_regclass('public.alert_events') AS exists`
@@ -2629,8 +2741,6 @@ async function getHealthReport() {
       }
     } catch (err) {
       pushRuntimeError("HEALTH_DB_ALERTS", err);
-    } finally {
-      await pool.end();
     }
   }
 
@@ -2946,7 +3056,7 @@ async function loadFundsState(databaseUrl: string | undefined) {
   if (!databaseUrl) {
     return null;
   }
-  const pool = new Pool({ connectionString: databaseUrl });
+  const pool = getPostgresPool(databaseUrl);
   try {
     const state = await pool.query<{ value: string }>(
       `SELECT value FROM system_state WHERE key = 'last_available_funds' LIMIT 1`
@@ -2971,8 +3081,6 @@ async function loadFundsState(databaseUrl: string | undefined) {
     };
   } catch {
     return null;
-  } finally {
-    await pool.end();
   }
 }
 
@@ -3251,7 +3359,7 @@ async function checkDbHealth(databaseUrl: string | undefined) {
   if (!databaseUrl) {
     return { status: "off", latencyMs: null, message: "DATABASE_URL is not set" };
   }
-  const pool = new Pool({ connectionString: databaseUrl });
+  const pool = getPostgresPool(databaseUrl);
   const started = Date.now();
   try {
     await pool.query("SELECT 1");
@@ -3259,8 +3367,6 @@ async function checkDbHealth(databaseUrl: string | undefined) {
   } catch (err) {
     const message = err instanceof Error ? err.message : String(err);
     return { status: "down", latencyMs: Date.now() - started, message };
-  } finally {
-    await pool.end();
   }
 }
 
@@ -3329,16 +3435,7 @@ function getTokenLifetimeEstimate() {
 }
 
 function nextIstReset(from: Date, hour: number, minute: number) {
-  const parts = new Intl.DateTimeFormat("en-CA", {
-    timeZone: "Asia/Kolkata",
-    year: "numeric",
-    month: "2-digit",
-    day: "2-digit",
-    hour: "2-digit",
-    minute: "2-digit",
-    second: "2-digit",
-    hour12: false
-  }).formatToParts(from);
+  const parts = IST_DATE_TIME_FORMAT.formatToParts(from);
   const year = Number(parts.find((p) => p.type === "year")?.value ?? "1970");
   const month = Number(parts.find((p) => p.type === "month")?.value ?? "1");
   const day = Number(parts.find((p) => p.type === "day")?.value ?? "1");
@@ -3464,12 +3561,7 @@ function diagnoseBrokerOrder(reasonRaw: string, status: string) {
 }
 
 function getIstTradeDate(now = new Date()) {
-  const parts = new Intl.DateTimeFormat("en-CA", {
-    timeZone: "Asia/Kolkata",
-    year: "numeric",
-    month: "2-digit",
-    day: "2-digit"
-  }).formatToParts(now);
+  const parts = IST_DATE_FORMAT.formatToParts(now);
   const y = parts.find((p) => p.type === "year")?.value ?? "1970";
   const m = parts.find((p) => p.type === "month")?.value ?? "01";
   const d = parts.find((p) => p.type === "day")?.value ?? "01";
@@ -3775,8 +3867,18 @@ function journalAnalytics(
   };
 }
 
+let defaultScreenerSymbolsCache: { raw: string; symbols: string[] } | null = null;
+
 function defaultScreenerSymbols(): string[] {
-  const fromEnv = parseCsvQuery(process.env.SCREENER_SYMBOLS ?? "");
+  const raw = process.env.SCREENER_SYMBOLS ?? "";
+  if (defaultScreenerSymbolsCache?.raw !== raw) {
+    defaultScreenerSymbolsCache = { raw, symbols: parseDefaultScreenerSymbols(raw) };
+  }
+  return defaultScreenerSymbolsCache.symbols;
+}
+
+function parseDefaultScreenerSymbols(raw: string): string[] {
+  const fromEnv = parseCsvQuery(raw);
   if (fromEnv.length > 0) {
     return fromEnv;
   }
@@ -3825,12 +3927,12 @@ async function loadNiftyBenchmarkReturn(
     return 0;
   }
   try {
-    const bars = await provider.getHistoricalDayBars(nifty.instrumentToken, from, to);
-    if (bars.length < 61) {
+    // Only two closes are read, so take them from the close column directly.
+    const { close } = await provider.getHistoricalDaySeries(nifty.instrumentToken, from, to);
+    if (close.length < 61) {
       return 0;
     }
-    const closes = bars.map((b) => b.close);
-    return pctChange(closes[closes.length - 61], closes[closes.length - 1]);
+    return pctChange(close[close.length - 61], close[close.length - 1]);
   } catch {
     return 0;
   }
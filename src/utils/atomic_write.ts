@@ -0,0 +1,47 @@
+import { open, realpath, rename, stat, unlink } from "node:fs/promises";
+
+let tmpCounter = 0;
+
+// Write to a sibling temp file, fsync it, then rename over the target so
+// readers never observe a partially written file. The temp name is unique
+// per write so concurrent writers never share a temp file.
+//
+// Symlinks are resolved first so the link itself survives, and the temp file
+// takes the target's permission bits (0600 for new files) so a locked-down
+// .env never becomes readable through the rename. A failed write removes its
+// temp file.
+export async function writeFileAtomic(path: string, content: string) {
+  const target = await realpath(path).catch((err: NodeJS.ErrnoException) => {
+    if (err.code === "ENOENT") {
+      return path;
+    }
+    throw err;
+  });
+  const mode = await stat(target).then(
+    (st) => st.mode & 0o7777,
+    (err: NodeJS.ErrnoException) => {
+      if (err.code === "ENOENT") {
+        return 0o600;
+      }
+      throw err;
+    }
+  );
+
+  tmpCounter += 1;
+  const tmpPath = `${target}.${process.pid}.${tmpCounter}.tmp`;
+  const handle = await open(tmpPath, "wx", mode);
+  try {
+    try {
+      // open() applies the umask; chmod restores the exact target mode.
+      await handle.chmod(mode);
+      await handle.writeFile(content, "utf-8");
+      await handle.sync();
+    } finally {
+      await handle.close();
+    }
+    await rename(tmpPath, target);
+  } catch (err) {
+    await unlink(tmpPath).catch(() => undefined);
+    throw err;
+  }
+}
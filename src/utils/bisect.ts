@@ -0,0 +1,27 @@
+// Binary search over an ascending array, mirroring Python's bisect module.
+
+// First index whose value is >= target.
+export function bisectLeft<T>(values: ArrayLike<T>, target: T, lo = 0, hi = values.length) {
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (values[mid] < target) {
+      lo = mid + 1;
+    } else {
+      hi = mid;
+    }
+  }
+  return lo;
+}
+
+// First index whose value is > target.
+export function bisectRight<T>(values: ArrayLike<T>, target: T, lo = 0, hi = values.length) {
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (target < values[mid]) {
+      hi = mid;
+    } else {
+      lo = mid + 1;
+    }
+  }
+  return lo;
+}
@@ -1,16 +1,22 @@
-export function ema(values: number[], period: number): number {
+// Kernels take Float64Array only: every caller passes typed columns, so V8
+// sees one element kind at each call site and keeps the loops monomorphic.
+export function ema(values: Float64Array, period: number): number {
   if (values.length < period) {
     throw new Error(`Not enough values for EMA(${period})`);
   }
   const alpha = 2 / (period + 1);
-  let current = sma(values.slice(0, period));
+  let seed = 0;
+  for (let i = 0; i < period; i += 1) {
+    seed += values[i];
+  }
+  let current = seed / period;
   for (let i = period; i < values.length; i += 1) {
     current = values[i] * alpha + current * (1 - alpha);
   }
   return current;
 }
 
-export function rsi(values: number[], period: number): number {
+export function rsi(values: Float64Array, period: number): number {
   if (values.length < period + 1) {
     throw new Error(`Not enough values for RSI(${period})`);
   }
@@ -41,11 +47,15 @@ export function rsi(values: number[], period: number): number {
   return 100 - 100 / (1 + rs);
 }
 
-export function sma(values: number[]): number {
+export function sma(values: Float64Array): number {
   if (values.length === 0) {
     throw new Error("SMA requires at least one value");
   }
-  return values.reduce((acc, v) => acc + v, 0) / values.length;
+  let sum = 0;
+  for (let i = 0; i < values.length; i += 1) {
+    sum += values[i];
+  }
+  return sum / values.length;
 }
 
 export function pctChange(start: number, end: number): number {
@@ -56,9 +66,9 @@ export function pctChange(start: number, end: number): number {
 }
 
 export function atr(
-  highs: number[],
-  lows: number[],
-  closes: number[],
+  highs: Float64Array,
+  lows: Float64Array,
+  closes: Float64Array,
   period: number
 ): number {
   if (highs.length !== lows.length || highs.length !== closes.length) {
@@ -68,17 +78,256 @@ export function atr(
     throw new Error(`Not enough values for ATR(${period})`);
   }
 
-  const trueRanges: number[] = [];
-  for (let i = 1; i < highs.length; i += 1) {
-    const tr1 = highs[i] - lows[i];
-    const tr2 = Math.abs(highs[i] - closes[i - 1]);
-    const tr3 = Math.abs(lows[i] - closes[i - 1]);
-    trueRanges.push(Math.max(tr1, tr2, tr3));
+  // True ranges are consumed as they are produced; no intermediate array.
+  let seed = 0;
+  for (let i = 1; i <= period; i += 1) {
+    seed += trueRange(highs, lows, closes, i);
   }
-
-  let atrValue = sma(trueRanges.slice(0, period));
-  for (let i = period; i < trueRanges.length; i += 1) {
-    atrValue = (atrValue * (period - 1) + trueRanges[i]) / period;
+  let atrValue = seed / period;
+  for (let i = period + 1; i < highs.length; i += 1) {
+    atrValue = (atrValue * (period - 1) + trueRange(highs, lows, closes, i)) / period;
   }
   return atrValue;
 }
+
+// Trailing mean of a[i] * b[i] over the last `window` rows (all of them when
+// shorter), matching sma over the pairwise products without copying.
+export function trailingMeanProduct(
+  a: Float64Array,
+  b: Float64Array,
+  window: number
+): number {
+  const start = Math.max(0, a.length - window);
+  if (start >= a.length) {
+    throw new Error("SMA requires at least one value");
+  }
+  let sum = 0;
+  for (let i = start; i < a.length; i += 1) {
+    sum += a[i] * b[i];
+  }
+  return sum / (a.length - start);
+}
+
+export interface IndicatorSnapshot {
+  ema20: number;
+  ema50: number;
+  rsi14: number;
+  atr14: number;
+  high20: number;
+  adv20: number;
+  avgVolume20: number;
+  avgVolume50: number;
+}
+
+// Latest-bar screener indicators from one sweep over the columns. Each
+// accumulator performs the same operations in the same order as ema, rsi,
+// atr and the trailing means, so the results are identical to calling them
+// separately.
+export function indicatorSnapshot(
+  highs: Float64Array,
+  lows: Float64Array,
+  closes: Float64Array,
+  volumes: Float64Array
+): IndicatorSnapshot {
+  const n = closes.length;
+  if (highs.length !== n || lows.length !== n || volumes.length !== n) {
+    throw new Error("Indicator arrays must have same length");
+  }
+  if (n < 50) {
+    throw new Error("Not enough values for indicator snapshot");
+  }
+  const alpha20 = 2 / 21;
+  const alpha50 = 2 / 51;
+  const start20 = n - 20;
+  const start50 = n - 50;
+  let ema20 = 0;
+  let ema50 = 0;
+  let gains = 0;
+  let losses = 0;
+  let avgGain = 0;
+  let avgLoss = 0;
+  let atrValue = 0;
+  let high20 = Number.NEGATIVE_INFINITY;
+  let tradedValue20 = 0;
+  let volume20 = 0;
+  let volume50 = 0;
+
+  for (let i = 0; i < n; i += 1) {
+    const close = closes[i];
+    if (i < 20) {
+      ema20 += close;
+      if (i === 19) {
+        ema20 /= 20;
+      }
+    } else {
+      ema20 = close * alpha20 + ema20 * (1 - alpha20);
+    }
+    if (i < 50) {
+      ema50 += close;
+      if (i === 49) {
+        ema50 /= 50;
+      }
+    } else {
+      ema50 = close * alpha50 + ema50 * (1 - alpha50);
+    }
+
+    if (i >= 1) {
+      const delta = close - closes[i - 1];
+      const tr = trueRange(highs, lows, closes, i);
+      if (i <= 14) {
+        gains += Math.max(delta, 0);
+        losses += Math.max(-delta, 0);
+        atrValue += tr;
+        if (i === 14) {
+          avgGain = gains / 14;
+          avgLoss = losses / 14;
+          atrValue /= 14;
+        }
+      } else {
+        avgGain = (avgGain * 13 + Math.max(delta, 0)) / 14;
+        avgLoss = (avgLoss * 13 + Math.max(-delta, 0)) / 14;
+        atrValue = (atrValue * 13 + tr) / 14;
+      }
+    }
+
+    if (i >= start50) {
+      volume50 += volumes[i];
+    }
+    if (i >= start20) {
+      high20 = Math.max(high20, highs[i]);
+      tradedValue20 += close * volumes[i];
+      volume20 += volumes[i];
+    }
+  }
+
+  return {
+    ema20,
+    ema50,
+    rsi14: rsiFromAverages(avgGain, avgLoss),
+    atr14: atrValue,
+    high20,
+    adv20: tradedValue20 / 20,
+    avgVolume20: volume20 / 20,
+    avgVolume50: volume50 / 50
+  };
+}
+
+// Series variants evaluate the same recurrences as the scalar helpers in one
+// pass over the full history. out[i] equals the scalar result for
+// values[0..i]; rows without enough history are NaN.
+export function emaSeries(values: Float64Array, period: number): Float64Array {
+  const out = new Float64Array(values.length).fill(Number.NaN);
+  if (values.length < period) {
+    return out;
+  }
+  const alpha = 2 / (period + 1);
+  let seed = 0;
+  for (let i = 0; i < period; i += 1) {
+    seed += values[i];
+  }
+  let current = seed / period;
+  out[period - 1] = current;
+  for (let i = period; i < values.length; i += 1) {
+    current = values[i] * alpha + current * (1 - alpha);
+    out[i] = current;
+  }
+  return out;
+}
+
+export function rsiSeries(values: Float64Array, period: number): Float64Array {
+  const out = new Float64Array(values.length).fill(Number.NaN);
+  if (values.length < period + 1) {
+    return out;
+  }
+
+  let gains = 0;
+  let losses = 0;
+  for (let i = 1; i <= period; i += 1) {
+    const delta = values[i] - values[i - 1];
+    gains += Math.max(delta, 0);
+    losses += Math.max(-delta, 0);
+  }
+
+  let avgGain = gains / period;
+  let avgLoss = losses / period;
+  out[period] = rsiFromAverages(avgGain, avgLoss);
+
+  for (let i = period + 1; i < values.length; i += 1) {
+    const delta = values[i] - values[i - 1];
+    const gain = Math.max(delta, 0);
+    const loss = Math.max(-delta, 0);
+    avgGain = (avgGain * (period - 1) + gain) / period;
+    avgLoss = (avgLoss * (period - 1) + loss) / period;
+    out[i] = rsiFromAverages(avgGain, avgLoss);
+  }
+  return out;
+}
+
+export function atrSeries(
+  highs: Float64Array,
+  lows: Float64Array,
+  closes: Float64Array,
+  period: number
+): Float64Array {
+  if (highs.length !== lows.length || highs.length !== closes.length) {
+    throw new Error("ATR arrays must have same length");
+  }
+  const out = new Float64Array(highs.length).fill(Number.NaN);
+  if (highs.length < period + 1) {
+    return out;
+  }
+
+  let seed = 0;
+  for (let i = 1; i <= period; i += 1) {
+    seed += trueRange(highs, lows, closes, i);
+  }
+  let atrValue = seed / period;
+  out[period] = atrValue;
+  for (let i = period + 1; i < highs.length; i += 1) {
+    atrValue = (atrValue * (period - 1) + trueRange(highs, lows, closes, i)) / period;
+    out[i] = atrValue;
+  }
+  return out;
+}
+
+export function rollingMax(values: Float64Array, window: number): Float64Array {
+  const out = new Float64Array(values.length).fill(Number.NaN);
+  // Monotonic deque of indices whose values are strictly decreasing.
+  const deque = new Int32Array(values.length);
+  let head = 0;
+  let tail = 0;
+  for (let i = 0; i < values.length; i += 1) {
+    while (tail > head && values[deque[tail - 1]] <= values[i]) {
+      tail -= 1;
+    }
+    deque[tail] = i;
+    tail += 1;
+    if (deque[head] <= i - window) {
+      head += 1;
+    }
+    if (i >= window - 1) {
+      out[i] = values[deque[head]];
+    }
+  }
+  return out;
+}
+
+function rsiFromAverages(avgGain: number, avgLoss: number) {
+  if (avgLoss === 0) {
+    return 100;
+  }
+  const rs = avgGain / avgLoss;
+  return 100 - 100 / (1 + rs);
+}
+
+function trueRange(
+  highs: Float64Array,
+  lows: Float64Array,
+  closes: Float64Array,
+  i: number
+) {
+  const tr1 = highs[i] - lows[i];
+  const tr2 = Math.abs(highs[i] - closes[i - 1]);
+  const tr3 = Math.abs(lows[i] - closes[i - 1]);
+  return Math.max(tr1, tr2, tr3);
+}
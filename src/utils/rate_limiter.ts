@@ -0,0 +1,64 @@
+// Token bucket shared by every caller in the process. Callers reserve a
+// token before sleeping, so concurrent requests queue up at the configured
+// rate instead of all waking together and tripping the broker's 429s.
+export class TokenBucket {
+  private tokens: number;
+  private updatedAtMs = Date.now();
+
+  constructor(
+    private readonly ratePerSec: number,
+    private readonly capacity = 1
+  ) {
+    this.tokens = capacity;
+  }
+
+  async acquire() {
+    if (!(this.ratePerSec > 0)) {
+      return;
+    }
+    const now = Date.now();
+    this.tokens = Math.min(
+      this.capacity,
+      this.tokens + ((now - this.updatedAtMs) * this.ratePerSec) / 1000
+    );
+    this.updatedAtMs = now;
+    this.tokens -= 1;
+    if (this.tokens < 0) {
+      // A negative balance is the queue of callers already waiting.
+      await sleep((-this.tokens * 1000) / this.ratePerSec);
+    }
+  }
+}
+
+const buckets = new Map<string, TokenBucket>();
+
+function sharedBucket(name: string, ratePerSec: number) {
+  let bucket = buckets.get(name);
+  if (!bucket) {
+    bucket = new TokenBucket(ratePerSec);
+    buckets.set(name, bucket);
+  }
+  return bucket;
+}
+
+// Kite Connect publishes per-endpoint-class limits; a value of 0 disables
+// throttling for that class.
+export function kiteHistoricalBucket() {
+  return sharedBucket("historical", Number(process.env.KITE_HIST_RPS ?? "3"));
+}
+
+export function kiteQuoteBucket() {
+  return sharedBucket("quote", Number(process.env.KITE_QUOTE_RPS ?? "1"));
+}
+
+export function kiteOrderBucket() {
+  return sharedBucket("order", Number(process.env.KITE_ORDER_RPS ?? "10"));
+}
+
+export function kiteApiBucket() {
+  return sharedBucket("api", Number(process.env.KITE_API_RPS ?? "10"));
+}
+
+function sleep(ms: number): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
@@ -0,0 +1,65 @@
+// The k items with the highest score, best first, in O(n log k). Ties keep
+// input order, so the result equals a stable descending sort sliced to k.
+export function topK<T>(items: readonly T[], k: number, score: (item: T) => number): T[] {
+  const size = Math.min(Math.max(0, Math.floor(k)), items.length);
+  if (size === 0) {
+    return [];
+  }
+
+  // Min-heap of indices: the root is the weakest of the current top k.
+  const scores = new Float64Array(items.length);
+  for (let i = 0; i < items.length; i += 1) {
+    scores[i] = score(items[i]);
+  }
+  // a ranks below b: lower score, or the same score but later in the input.
+  const below = (a: number, b: number) =>
+    scores[a] < scores[b] || (scores[a] === scores[b] && a > b);
+
+  const heap = new Int32Array(size);
+  let count = 0;
+  const siftDown = (start: number) => {
+    let i = start;
+    for (;;) {
+      const left = i * 2 + 1;
+      const right = left + 1;
+      let weakest = i;
+      if (left < count && below(heap[left], heap[weakest])) {
+        weakest = left;
+      }
+      if (right < count && below(heap[right], heap[weakest])) {
+        weakest = right;
+      }
+      if (weakest === i) {
+        return;
+      }
+      const tmp = heap[i];
+      heap[i] = heap[weakest];
+      heap[weakest] = tmp;
+      i = weakest;
+    }
+  };
+
+  for (let idx = 0; idx < items.length; idx += 1) {
+    if (count < size) {
+      let i = count;
+      heap[count] = idx;
+      count += 1;
+      while (i > 0) {
+        const parent = (i - 1) >> 1;
+        if (!below(heap[i], heap[parent])) {
+          break;
+        }
+        const tmp = heap[i];
+        heap[i] = heap[parent];
+        heap[parent] = tmp;
+        i = parent;
+      }
+    } else if (below(heap[0], idx)) {
+      heap[0] = idx;
+      siftDown(0);
+    }
+  }
+
+  const order = Array.from(heap).sort((a, b) => (below(a, b) ? 1 : below(b, a) ? -1 : 0));
+  return order.map((i) => items[i]);
+}
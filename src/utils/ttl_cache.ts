@@ -0,0 +1,43 @@
+export class TtlCache<K, V> {
+  private readonly entries = new Map<K, { expiresAtMs: number; value: V }>();
+
+  constructor(
+    private readonly ttlMs: number,
+    private readonly maxEntries = 256
+  ) {}
+
+  get(key: K): V | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      return undefined;
+    }
+    if (Date.now() >= entry.expiresAtMs) {
+      this.entries.delete(key);
+      return undefined;
+    }
+    return entry.value;
+  }
+
+  set(key: K, value: V) {
+    if (this.ttlMs <= 0) {
+      return;
+    }
+    this.entries.delete(key);
+    if (this.entries.size >= this.maxEntries) {
+      // Map iteration order is insertion order, so the first key is the oldest.
+      const oldest = this.entries.keys().next();
+      if (!oldest.done) {
+        this.entries.delete(oldest.value);
+      }
+    }
+    this.entries.set(key, { expiresAtMs: Date.now() + this.ttlMs, value });
+  }
+
+  delete(key: K) {
+    this.entries.delete(key);
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+}